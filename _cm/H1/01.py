@@ -1,39 +1,273 @@
 import math
+import warnings
+import numpy as np
 
-# 定義數值微分：使用對稱差分法 (Symmetric Difference Quotient)
-def df(f, x, h=1e-7):
-    return (f(x + h) - f(x - h)) / (2 * h)
+# --- 批次求值：f 支援 NumPy 陣列就一次算完，否則退回逐點呼叫 ---
+def batched(f, dtype=float):
+    """
+    將 f 包裝成接受 1-D 陣列的函數 g(xs) -> ndarray
+    第一次呼叫時試著把整個陣列丟給 f，若 f 不支援 (例如內部用 math.sin)
+    或回傳形狀不對，之後就改用逐點呼叫
+    dtype 為輸入與輸出的型別，複數步長微分時使用 complex
+    """
+    vectorized = [None]  # None: 尚未判斷；True/False: 判斷結果
 
-# 定義數值積分：使用黎曼和（中點法）
-def integral(f, a, b, n=100000):
+    def g(xs):
+        xs = np.asarray(xs, dtype=dtype)
+        if vectorized[0] is not False:
+            try:
+                ys = np.asarray(f(xs), dtype=dtype)
+                if ys.shape == xs.shape:
+                    vectorized[0] = True
+                    return ys
+            except (TypeError, ValueError):
+                pass
+            vectorized[0] = False
+        return np.array([f(x) for x in xs.tolist()], dtype=dtype)
+
+    return g
+
+# 自動步長的比例係數：讓截斷誤差與捨入誤差大致平衡
+_EPS = np.finfo(float).eps
+_AUTO_STEP = {"central": _EPS ** (1 / 3), "richardson": _EPS ** (1 / 5), "complex": 1e-20}
+
+# 定義數值微分：預設使用對稱差分法 (Symmetric Difference Quotient)
+def df(f, x, h=None, method="central"):
+    """
+    批次數值微分，x 可以是純量或任意形狀的陣列
+    所有位移後的點 (x±h 等) 疊成一個陣列，只呼叫 f 一次
+    method:
+      "central"    對稱差分 (f(x+h) - f(x-h)) / 2h，誤差 O(h^2)
+      "richardson" 以 h 與 h/2 兩個對稱差分做 Richardson 外插，誤差 O(h^4)
+      "complex"    複數步長 Im f(x+ih) / h，沒有相減抵銷，f 必須是解析函數且支援複數
+    h: 步長；None 時依 method 自動選擇，並隨 |x| 縮放
+    """
+    if method not in _AUTO_STEP:
+        raise ValueError(f"未知的微分方法: {method}")
+    x = np.asarray(x, dtype=float)
+    if h is None:
+        h = _AUTO_STEP[method] * np.maximum(1.0, np.abs(x))
+    h = np.broadcast_to(np.asarray(h, dtype=float), x.shape)
+
+    if method == "complex":
+        ys = batched(f, complex)((x + 1j * h).ravel()).reshape(x.shape)
+        return (ys.imag / h)[()]
+
+    g = batched(f)
+    if method == "central":
+        shifts = np.stack([x + h, x - h])
+        ys = g(shifts.ravel()).reshape(shifts.shape)
+        return ((ys[0] - ys[1]) / (2 * h))[()]
+    if method == "richardson":
+        shifts = np.stack([x + h, x - h, x + h / 2, x - h / 2])
+        ys = g(shifts.ravel()).reshape(shifts.shape)
+        d1 = (ys[0] - ys[1]) / (2 * h)
+        d2 = (ys[2] - ys[3]) / h
+        return ((4 * d2 - d1) / 3)[()]
+
+# 15 點 Gauss-Kronrod 節點與權重 (取自 QUADPACK qk15)，只存非負的一半
+_GK15_X = np.array([
+    0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245, 0.000000000000000000000000000000000])
+_GK15_WK = np.array([
+    0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649, 0.209482141084727828012999174891714])
+# 7 點 Gauss 權重，對應 Kronrod 節點中的奇數位置 (index 1, 3, 5, 7)
+_GK15_WG = np.array([
+    0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975, 0.417959183673469387755102040816327])
+
+# 展開成完整 15 點 (左半、中點、右半)
+_GK_NODES = np.concatenate([-_GK15_X[:-1], _GK15_X[::-1]])
+_GK_WK = np.concatenate([_GK15_WK[:-1], _GK15_WK[::-1]])
+_GK_WG = np.zeros(15)
+_GK_WG[[1, 3, 5]] = _GK15_WG[:3]
+_GK_WG[[9, 11, 13]] = _GK15_WG[2::-1]
+_GK_WG[7] = _GK15_WG[3]
+
+def _rule_gk15(g, lo, hi):
+    """對所有區間 [lo_i, hi_i] 一次套用 G7-K15，回傳 (估計值, 誤差, 節點上的函數值)"""
+    mid = 0.5 * (lo + hi)
+    half = 0.5 * (hi - lo)
+    xs = mid[:, None] + half[:, None] * _GK_NODES
+    ys = g(xs.ravel()).reshape(xs.shape)
+    kronrod = half * (ys @ _GK_WK)
+    gauss = half * (ys @ _GK_WG)
+    return kronrod, np.abs(kronrod - gauss), ys
+
+def _rule_simpson(g, lo, hi):
+    """對所有區間一次套用 Simpson 法：比較整段與兩半段的結果，並做 Richardson 修正"""
+    xs = lo[:, None] + (hi - lo)[:, None] * np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+    ys = g(xs.ravel()).reshape(xs.shape)
+    h = hi - lo
+    whole = h / 6 * (ys[:, 0] + 4 * ys[:, 2] + ys[:, 4])
+    halves = h / 12 * (ys[:, 0] + 4 * ys[:, 1] + 2 * ys[:, 2] + 4 * ys[:, 3] + ys[:, 4])
+    diff = halves - whole
+    return halves + diff / 15, np.abs(diff) / 15, ys
+
+_RULES = {"gk15": _rule_gk15, "simpson": _rule_simpson}
+
+def _adapt(rule, g, a, b, tol, rtol, max_rounds):
+    """
+    自適應切割 [a, b] (需 a < b)
+    每一輪把所有尚未收斂的子區間一起求值 (一次批次呼叫 f)，
+    誤差超過「依寬度分配的容許量」的區間就對半切開，進入下一輪
+    回傳依位置排序的子區間：(lo, hi, 估計值, 誤差, 節點函數值, 求值次數)
+    """
+    lo, hi = np.array([a], dtype=float), np.array([b], dtype=float)
+    parts, total, nfev = [], 0.0, 0
+
+    for _ in range(max_rounds):
+        est, err, ys = rule(g, lo, hi)
+        nfev += ys.size
+        # 容許誤差依區間寬度按比例分配，整體目標為 max(tol, rtol * |積分值|)
+        target = max(tol, rtol * abs(total + est.sum()))
+        done = err <= target * (hi - lo) / (b - a)
+        total += est[done].sum()
+        parts.append((lo[done], hi[done], est[done], err[done], ys[done]))
+        if done.all():
+            break
+        lo, hi = lo[~done], hi[~done]
+        mid = 0.5 * (lo + hi)
+        lo, hi = np.concatenate([lo, mid]), np.concatenate([mid, hi])
+    else:
+        # 達到輪數上限：剩下的區間也收下，誤差如實回報
+        parts.append((lo, hi, est, err, ys))
+
+    lo, hi, est, err, ys = (np.concatenate(col) for col in zip(*parts))
+    order = np.argsort(lo)
+    return lo[order], hi[order], est[order], err[order], ys[order], nfev
+
+def quad(f, a, b, tol=1e-10, rtol=1e-10, method="gk15", max_rounds=50):
+    """
+    自適應數值積分 ∫[a, b] f(x) dx
+    回傳：(積分值, 誤差估計, f 的求值次數)
+    """
+    if a == b:
+        return 0.0, 0.0, 0
+    if a > b:
+        value, err, nfev = quad(f, b, a, tol, rtol, method, max_rounds)
+        return -value, err, nfev
+
+    _, _, est, err, _, nfev = _adapt(_RULES[method], batched(f), a, b, tol, rtol, max_rounds)
+    return est.sum(), err.sum(), nfev
+
+# 定義數值積分：使用自適應 Gauss-Kronrod (取代原本 n=100000 的中點法迴圈)
+def integral(f, a, b, n=None, tol=1e-10, method="gk15"):
+    """
+    n: 舊版中點法的分割數，僅為相容而保留 (已不建議使用)；
+       指定時發出 DeprecationWarning，並以批次呼叫 f 的 n 點中點法計算，結果與舊版相同
+    """
     if a == b: return 0
-    h = (b - a) / n
-    total_sum = 0
-    for i in range(n):
-        # 取中點
-        mid = a + (i + 0.5) * h
-        total_sum += f(mid)
-    return total_sum * h
+    if n is not None:
+        warnings.warn("integral 的 n 參數已不建議使用，請改用 tol 控制誤差",
+                      DeprecationWarning, stacklevel=2)
+        h = (b - a) / n
+        return float(batched(f)(a + (np.arange(n) + 0.5) * h).sum() * h)
+    return quad(f, a, b, tol=tol, method=method)[0]
+
+# --- 累積積分 (反導函數) 物件：F(x) = ∫[a, x] f(t) dt ---
+class Antiderivative:
+    """
+    在自適應網格上一次算好累積積分，之後查詢 F(x) 與 F'(x) 只需
+    二分搜尋找到所在子區間 (O(log n))，再在該區間內做多項式內插
+    每個子區間以 15 個 Kronrod 節點的函數值建立 14 次 Legendre 內插多項式 p(t)，
+    其解析積分恰好等於該區間的 K15 積分估計，因此區間端點的 F 值與 quad 一致
+    查詢超出目前網格範圍的 x 時，才把網格延伸到 x
+    """
+
+    def __init__(self, f, a=0.0, b=None, tol=1e-10):
+        self.g = batched(f)
+        self.tol = tol
+        self.nfev = 0
+        self.edges = np.array([float(a)])    # 子區間端點 (遞增)
+        self.F_edges = np.array([0.0])       # 各端點上的 F 值，F(a) = 0
+        self.p_coefs = np.zeros((15, 0))     # 各子區間 f 的 Legendre 係數 (行向量)
+        self.P_coefs = np.zeros((16, 0))     # 各子區間 ∫p 的 Legendre 係數 (行向量)
+        if b is not None:
+            self._extend(b)
+
+    def _panels(self, lo, hi):
+        """建立 [lo, hi] 上的子區間，回傳 (端點, 區間積分, p 係數, P 係數)"""
+        lo_, hi_, est, _, ys, nfev = _adapt(_rule_gk15, self.g, lo, hi, self.tol, self.tol, 50)
+        self.nfev += nfev
+        half = 0.5 * (hi_ - lo_)
+        p = np.polynomial.legendre.legfit(_GK_NODES, ys.T, 14)
+        # 局部座標 t ∈ [-1, 1]，dx = half·dt，且令 P(-1) = 0
+        P = np.polynomial.legendre.legint(p, lbnd=-1) * half
+        return np.append(lo_, hi_[-1]), est, p, P
+
+    def _extend(self, x):
+        """把網格延伸到涵蓋 x"""
+        left, right = self.edges[0], self.edges[-1]
+        if x > right:
+            edges, est, p, P = self._panels(right, x)
+            self.edges = np.concatenate([self.edges, edges[1:]])
+            self.F_edges = np.concatenate([self.F_edges, self.F_edges[-1] + np.cumsum(est)])
+            self.p_coefs = np.hstack([self.p_coefs, p])
+            self.P_coefs = np.hstack([self.P_coefs, P])
+        elif x < left:
+            edges, est, p, P = self._panels(x, left)
+            # 新區間在左邊：F 值從 F(left) 往回扣
+            F_new = self.F_edges[0] - np.cumsum(est[::-1])[::-1]
+            self.edges = np.concatenate([edges[:-1], self.edges])
+            self.F_edges = np.concatenate([F_new, self.F_edges])
+            self.p_coefs = np.hstack([p, self.p_coefs])
+            self.P_coefs = np.hstack([P, self.P_coefs])
+
+    def _locate(self, x):
+        """回傳 (x 陣列, 所在子區間索引, 局部座標 t)"""
+        x = np.asarray(x, dtype=float)
+        if x.size:
+            self._extend(x.max())
+            self._extend(x.min())
+        if len(self.edges) == 1:
+            # 尚未建立任何子區間 (只查詢 x = a)
+            return x, None, None
+        i = np.clip(np.searchsorted(self.edges, x, side="right") - 1, 0, len(self.edges) - 2)
+        lo, hi = self.edges[i], self.edges[i + 1]
+        t = (2 * x - lo - hi) / (hi - lo)
+        return x, i, t
+
+    def __call__(self, x):
+        """F(x) = ∫[a, x] f(t) dt，x 可以是純量或陣列"""
+        x, i, t = self._locate(x)
+        if i is None:
+            return np.zeros_like(x)[()]
+        leg = np.polynomial.legendre.legval(t, self.P_coefs[:, i], tensor=False)
+        return (self.F_edges[i] + leg)[()]
+
+    def derivative(self, x):
+        """F'(x)，即子區間內插多項式在 x 的值 (≈ f(x))"""
+        x, i, t = self._locate(x)
+        if i is None:
+            return self.g(np.atleast_1d(x)).reshape(x.shape)[()]
+        return np.polynomial.legendre.legval(t, self.p_coefs[:, i], tensor=False)[()]
 
 # 驗證微積分基本定理
 def theorem1(f, x, tol=1e-5):
     # 定義變數上限函數 F(x) = ∫[0, x] f(t) dt
-    F = lambda x_val: integral(f, 0, x_val)
-    
+    # 累積積分只需建立一次，df 的兩次查詢都只是在網格上內插
+    F = Antiderivative(f, 0)
+
     # 計算 d/dx F(x)
     derivative_of_integral = df(F, x)
-    
+
     # 取得原始函數值 f(x)
     actual_f_x = f(x)
-    
+
     # 驗證兩者是否接近
     is_verified = math.isclose(derivative_of_integral, actual_f_x, rel_tol=tol)
-    
+
     print(f"在 x = {x} 處：")
     print(f"d/dx [∫f(t)dt] = {derivative_of_integral:.6f}")
     print(f"f(x)             = {actual_f_x:.6f}")
     print(f"驗證結果：{'通過' if is_verified else '失敗'}")
-    
+
     return is_verified
 
 # --- 測試案例 ---
@@ -42,4 +276,30 @@ print("測試 f(x) = x^2")
 theorem1(lambda x: x**2, 3.0)
 
 print("\n測試 f(x) = sin(x)")
-theorem1(lambda x: math.sin(x), math.pi / 4)
\ No newline at end of file
+theorem1(lambda x: math.sin(x), math.pi / 4)
+
+# 比較各積分法的求值次數 (原本的中點法固定呼叫 f 100000 次)
+print("\n自適應積分：∫[0, π] sin(x) dx = 2")
+for method in _RULES:
+    value, err, nfev = quad(math.sin, 0, math.pi, method=method)
+    print(f"{method:>8}: 值 = {value:.15f}, 誤差估計 = {err:.2e}, 求值次數 = {nfev}")
+value, err, nfev = quad(lambda x: np.sqrt(x), 0, 1)
+print(f"∫[0, 1] √x dx = {value:.15f} (理論值 2/3), 誤差估計 = {err:.2e}, 求值次數 = {nfev}")
+
+# 累積積分：一次建網格，之後大量查詢 F(x) 與 F'(x)
+print("\n累積積分 F(x) = ∫[0, x] cos(t) dt")
+F = Antiderivative(np.cos, 0, 10)
+xs = np.linspace(0, 10, 5000)
+print(f"建網格求值次數 = {F.nfev}, 子區間數 = {len(F.edges) - 1}")
+print(f"max |F(x) - sin(x)|  = {np.max(np.abs(F(xs) - np.sin(xs))):.2e}")
+print(f"max |F'(x) - cos(x)| = {np.max(np.abs(F.derivative(xs) - np.cos(xs))):.2e}")
+F(12.0)
+print(f"查詢 x = 12 後延伸網格，累計求值次數 = {F.nfev}, F(12) - sin(12) = {F(12.0) - math.sin(12.0):.2e}")
+
+# 批次微分：一次呼叫 f 就掃過整個網格
+print("\n批次微分 d/dx sin(x)，10^6 個點")
+xs = np.linspace(-10, 10, 10**6)
+for method in _AUTO_STEP:
+    err = np.max(np.abs(df(np.sin, xs, method=method) - np.cos(xs)))
+    print(f"{method:>10}: max 誤差 = {err:.2e}")
+print(f"純量輸入仍可用：df(math.exp, 1.0) = {df(math.exp, 1.0):.12f}")
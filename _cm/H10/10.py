@@ -1,7 +1,12 @@
 import cmath
+import os
+import tempfile
+import time
+from collections import OrderedDict
+import numpy as np
 
-def dft(f):
-    """離散傅立葉正轉換"""
+def dft_naive(f):
+    """離散傅立葉正轉換 (原始 O(N^2) 雙層迴圈版本，保留作為對照)"""
     N = len(f)
     F = [0] * N
     for k in range(N):
@@ -11,8 +16,8 @@ def dft(f):
             F[k] += f[n] * cmath.exp(angle)
     return F
 
-def idft(F):
-    """離散傅立葉逆轉換"""
+def idft_naive(F):
+    """離散傅立葉逆轉換 (原始 O(N^2) 雙層迴圈版本，保留作為對照)"""
     N = len(F)
     f = [0] * N
     for n in range(N):
@@ -24,6 +29,539 @@ def idft(F):
         f[n] /= N
     return f
 
+# ==========================================
+# FFT 引擎：O(N log N)
+# ==========================================
+# 質因數不超過 _MAX_RADIX 的長度走混合基數 (mixed-radix)，否則走 Bluestein
+_MAX_RADIX = 13
+
+def _factorize(N):
+    """把 N 拆成各級的基數：先盡量取 4，再取 2，最後是奇質數 (由小到大)"""
+    radices = []
+    if N == 0:
+        return radices
+    while N % 4 == 0:
+        radices.append(4)
+        N //= 4
+    if N % 2 == 0:
+        radices.append(2)
+        N //= 2
+    p = 3
+    while p * p <= N:
+        while N % p == 0:
+            radices.append(p)
+            N //= p
+        p += 2
+    if N > 1:
+        radices.append(N)
+    return radices
+
+class FFTPlan:
+    """
+    長度 N、單一方向的轉換計畫：建立時把所有與資料無關的東西算好
+      - 每一級的基數與旋轉因子 (twiddle factors)
+      - 一般基數 r 的 r×r 小 DFT 矩陣
+      - Bluestein 的 chirp 及其卷積核的頻譜 (含內層 2 的冪次計畫)
+    執行時只做乘加，中間結果寫進計畫自帶、可重複使用的工作緩衝區，
+    因此同長度的重複轉換除了輸出陣列之外不再配置記憶體
+    (工作緩衝區為計畫共用，同一個計畫不可同時在多個執行緒中使用)
+    direction: "forward" 為 exp(-iθ)，"inverse" 為 exp(+iθ) 並乘上 1/N
+    """
+
+    def __init__(self, N, direction="forward"):
+        if direction not in ("forward", "inverse"):
+            raise ValueError(f"未知的轉換方向: {direction}")
+        self.N = N
+        self.direction = direction
+        sign = -1 if direction == "forward" else 1
+        self.scale = 1.0 / N if direction == "inverse" and N else 1.0
+        self.rotate = 1j if direction == "inverse" else -1j  # radix-4 蝴蝶中的 ±i
+        self._work = (np.empty(0, dtype=complex), np.empty(0, dtype=complex))
+
+        radices = _factorize(N)
+        self.bluestein = bool(radices) and radices[-1] > _MAX_RADIX
+        if self.bluestein:
+            # X[k] = conj(b[k]) · Σ x[n]·conj(b[n])·b[k-n]，逆方向時 b 換成 conj(b)
+            # n² 先對 2N 取餘數避免大角度失準
+            n = np.arange(N)
+            b = np.exp(-sign * 1j * np.pi * ((n * n) % (2 * N)) / N)
+            M = 1 << (2 * N - 2).bit_length()
+            self.chirp = b.conj()
+            self.inner_forward = FFTPlan(M, "forward")
+            self.inner_inverse = FFTPlan(M, "inverse")
+            kernel = np.zeros((1, M), dtype=complex)
+            kernel[0, :N] = b
+            kernel[0, M - N + 1:] = b[1:][::-1]
+            self.kernel_spectrum = self.inner_forward(kernel)
+            self.radices, self.twiddles, self.matrices = [], [], []
+            return
+
+        # 每一級的旋轉因子 T[k, q] = exp(∓2πi·q·k / (r·L))，形狀 (L, r, 1)
+        # L 為該級之前已合併的長度；q·k 先對 r·L 取餘數以保持角度精度
+        self.radices, self.twiddles, self.matrices = radices, [], []
+        L = 1
+        for r in radices:
+            k = np.arange(L)[:, None]
+            q = np.arange(r)[None, :]
+            angle = sign * 2 * np.pi * ((k * q) % (r * L)) / (r * L)
+            self.twiddles.append(np.exp(1j * angle)[:, :, None])
+            if r in (2, 4):
+                self.matrices.append(None)
+            else:
+                self.matrices.append(np.exp(sign * 2j * np.pi * np.outer(np.arange(r), np.arange(r)) / r))
+            L *= r
+
+    @property
+    def nbytes(self):
+        """
+        計畫預先計算的表格佔用的記憶體
+        工作緩衝區隨批次大小變動、下次呼叫會重複使用，屬於暫存空間，不計入 (見 work_nbytes)
+        """
+        total = sum(t.nbytes for t in self.twiddles)
+        total += sum(W.nbytes for W in self.matrices if W is not None)
+        if self.bluestein:
+            total += self.chirp.nbytes + self.kernel_spectrum.nbytes
+            total += self.inner_forward.nbytes + self.inner_inverse.nbytes
+        return total
+
+    @property
+    def work_nbytes(self):
+        """目前工作緩衝區的大小"""
+        total = self._work[0].nbytes + self._work[1].nbytes
+        if self.bluestein:
+            total += self.inner_forward.work_nbytes + self.inner_inverse.work_nbytes
+        return total
+
+    def _workspace(self, size):
+        """取得兩塊至少 size 個元素的工作緩衝區，不夠大時才重新配置"""
+        if self._work[0].size < size:
+            self._work = (np.empty(size, dtype=complex), np.empty(size, dtype=complex))
+        return self._work[0][:size], self._work[1][:size]
+
+    def __call__(self, x, out=None):
+        """
+        沿最後一個軸轉換，x 形狀 (..., N)；out 可傳入預先配置好的輸出陣列
+        """
+        x = np.asarray(x, dtype=complex)
+        if x.shape[-1] != self.N:
+            raise ValueError(f"計畫長度為 {self.N}，輸入長度為 {x.shape[-1]}")
+        if out is None:
+            out = np.empty(x.shape, dtype=complex)
+        B = x.size // self.N if self.N else 0
+        x2, out2 = x.reshape(B, self.N), out.reshape(B, self.N)
+        if self.bluestein:
+            self._run_bluestein(x2, out2)
+        elif not self.radices:
+            np.copyto(out2, x2)
+        else:
+            self._run_mixed_radix(x2, out2)
+        if self.scale != 1.0:
+            out *= self.scale
+        return out
+
+    def _run_mixed_radix(self, x, out):
+        """
+        自我排序 (self-sorting) 的迭代式 Cooley-Tukey，所有運算都以整個陣列進行
+        X 形狀為 (B, L, M)：第 m 行是子序列 x[m::M] 長度 L 的 DFT
+        每一級把 r 個相鄰的行區塊合併成長度 r·L 的 DFT，直到 M = 1
+        因為以 reshape 取代元素交換，不需要位元反轉 (bit-reversal) 排列
+        每一級先把乘上旋轉因子的結果寫進 work_a，再把蝴蝶運算結果寫進 work_b
+        (最後一級直接寫進 out)
+        """
+        B, N = x.shape
+        work_a, work_b = self._workspace(B * N)
+        X, L = x, 1
+        last = len(self.radices) - 1
+        for i, (r, T, W) in enumerate(zip(self.radices, self.twiddles, self.matrices)):
+            M = N // (L * r)
+            a = work_a.reshape(B, L, r, M)
+            np.multiply(X.reshape(B, L, r, M), T, out=a)
+            Y = (out if i == last else work_b).reshape(B, r, L, M)
+            if r == 2:
+                np.add(a[:, :, 0], a[:, :, 1], out=Y[:, 0])
+                np.subtract(a[:, :, 0], a[:, :, 1], out=Y[:, 1])
+            elif r == 4:
+                a0, a1, a2, a3 = a[:, :, 0], a[:, :, 1], a[:, :, 2], a[:, :, 3]
+                np.add(a0, a2, out=Y[:, 0])         # s02
+                np.subtract(a0, a2, out=Y[:, 1])    # d02
+                np.add(a1, a3, out=Y[:, 2])         # s13
+                np.subtract(a1, a3, out=Y[:, 3])
+                Y[:, 3] *= self.rotate              # d13
+                # Y0 = s02 + s13, Y2 = s02 - s13, Y1 = d02 + d13, Y3 = d02 - d13 (a0, a1 當暫存)
+                np.subtract(Y[:, 0], Y[:, 2], out=a0)
+                np.add(Y[:, 0], Y[:, 2], out=Y[:, 0])
+                np.copyto(Y[:, 2], a0)
+                np.subtract(Y[:, 1], Y[:, 3], out=a1)
+                np.add(Y[:, 1], Y[:, 3], out=Y[:, 1])
+                np.copyto(Y[:, 3], a1)
+            else:
+                np.einsum("sq,blqm->bslm", W, a, out=Y)
+            L *= r
+            X = Y
+
+    def _run_bluestein(self, x, out):
+        """把長度 N 的 DFT 化成長度 M (2 的冪次) 的循環卷積"""
+        B, N = x.shape
+        M = self.inner_forward.N
+        work_a, work_b = self._workspace(B * M)
+        a, A = work_a.reshape(B, M), work_b.reshape(B, M)
+        a[:, N:] = 0
+        np.multiply(x, self.chirp, out=a[:, :N])
+        self.inner_forward(a, out=A)
+        A *= self.kernel_spectrum
+        self.inner_inverse(A, out=a)
+        np.multiply(a[:, :N], self.chirp, out=out)
+
+class RealFFTPlan:
+    """
+    實數訊號的轉換計畫，只處理 Hermitian 對稱中不重複的 N//2+1 個頻率
+      forward: 實數 (..., N) → 複數 (..., N//2+1)
+      inverse: 複數 (..., N//2+1) → 實數 (..., N)
+    N 為偶數時把相鄰兩個實數樣本當成一個複數 z[n] = x[2n] + i·x[2n+1]，
+    只做一次長度 N/2 的複數 FFT，再用旋轉因子拆出奇偶兩半的頻譜，
+    計算量與輸出記憶體都約為複數路徑的一半
+    N 為奇數時退回長度 N 的複數 FFT
+    """
+
+    def __init__(self, N, direction="forward"):
+        if direction not in ("forward", "inverse"):
+            raise ValueError(f"未知的轉換方向: {direction}")
+        self.N = N
+        self.direction = direction
+        self.bins = N // 2 + 1
+        if N % 2:
+            self.full = FFTPlan(N, direction)
+            return
+        half = N // 2
+        self.half = FFTPlan(half, direction)
+        # 後處理用的暫存緩衝區，形狀不同時才重新配置
+        self._z = self._zr = np.empty(0, dtype=complex)
+        k = np.arange(half + 1)
+        w = np.exp(-2j * np.pi * k / N)      # w^k = exp(-2πik/N)
+        if direction == "forward":
+            # X[k] = Fe[k] + w^k·Fo[k]，Fe = (Z[k] + conj(Z[N/2-k]))/2，Fo = (Z[k] - conj(Z[N/2-k]))/2i
+            self.c1 = (1 - 1j * w) / 2
+            self.c2 = (1 + 1j * w) / 2
+        else:
+            # Z[k] = Fe[k] + i·Fo[k]，Fe = (X[k] + conj(X[N/2-k]))/2，Fo = (X[k] - conj(X[N/2-k]))/(2w^k)
+            self.c1 = ((1 + 1j * w.conj()) / 2)[:half]
+            self.c2 = ((1 - 1j * w.conj()) / 2)[:half]
+
+    @staticmethod
+    def _buffer(buf, shape):
+        return buf if buf.shape == shape else np.empty(shape, dtype=complex)
+
+    @property
+    def nbytes(self):
+        if self.N % 2:
+            return self.full.nbytes
+        return self.half.nbytes + self.c1.nbytes + self.c2.nbytes
+
+    @property
+    def work_nbytes(self):
+        if self.N % 2:
+            return self.full.work_nbytes
+        return self.half.work_nbytes + self._z.nbytes + self._zr.nbytes
+
+    def __call__(self, x, out=None):
+        if self.direction == "forward":
+            return self._forward(x, out)
+        return self._inverse(x, out)
+
+    def _forward(self, x, out):
+        x = np.ascontiguousarray(x, dtype=float)
+        if x.shape[-1] != self.N:
+            raise ValueError(f"計畫長度為 {self.N}，輸入長度為 {x.shape[-1]}")
+        if out is None:
+            out = np.empty(x.shape[:-1] + (self.bins,), dtype=complex)
+        if self.N % 2:
+            np.copyto(out, self.full(x)[..., :self.bins])
+            return out
+        # 連續的 float64 陣列可以零複製地看成長度 N/2 的複數陣列
+        half = self.N // 2
+        Z = self._z = self.half(x.view(complex), out=self._buffer(self._z, x.shape[:-1] + (half,)))
+        # Z[N/2-k] 對 k = 1..N/2-1 即 Z 反轉去掉第 0 項；k = 0 與 k = N/2 都對應 Z[0]
+        zr = self._zr = self._buffer(self._zr, Z.shape)
+        np.conjugate(Z[..., :0:-1], out=zr[..., 1:])
+        np.conjugate(Z[..., 0], out=zr[..., 0])
+        np.multiply(Z, self.c1[:half], out=out[..., :half])
+        np.multiply(Z[..., 0], self.c1[half], out=out[..., half])
+        zr[..., 1:] *= self.c2[1:half]
+        out[..., 1:half] += zr[..., 1:]
+        out[..., 0] += zr[..., 0] * self.c2[0]
+        out[..., half] += zr[..., 0] * self.c2[half]
+        return out
+
+    def _inverse(self, X, out):
+        X = np.asarray(X, dtype=complex)
+        if X.shape[-1] != self.bins:
+            raise ValueError(f"計畫需要 {self.bins} 個頻率，輸入為 {X.shape[-1]} 個")
+        if out is None:
+            out = np.empty(X.shape[:-1] + (self.N,), dtype=float)
+        if self.N % 2:
+            # 用 Hermitian 對稱補齊完整頻譜
+            full = np.concatenate([X, X[..., :0:-1].conj()], axis=-1)
+            np.copyto(out, self.full(full).real)
+            return out
+        half = self.N // 2
+        Z = self._z = self._buffer(self._z, X.shape[:-1] + (half,))
+        zr = self._zr = self._buffer(self._zr, Z.shape)
+        # X[N/2-k] 對 k = 0..N/2-1 即 X[1..N/2] 反轉
+        np.conjugate(X[..., :0:-1], out=zr)
+        zr *= self.c2
+        np.multiply(X[..., :half], self.c1, out=Z)
+        Z += zr
+        # 逆轉換結果 z[n] = x[2n] + i·x[2n+1]，直接寫進實數輸出的記憶體
+        self.half(Z, out=out.view(complex))
+        return out
+
+class PlanCache:
+    """
+    以 (種類, N, direction) 為鍵的 LRU 計畫快取，預先計算的表格總量超過 max_bytes 時
+    從最久未使用的計畫開始淘汰 (至少保留剛放入的那一個)
+    工作緩衝區只是暫存空間，大小取決於呼叫時的批次大小，不計入上限；
+    否則一次大批次轉換就會讓快取把其他計畫全部淘汰
+    hits / misses / evictions 記錄快取命中、未命中與淘汰次數
+    """
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, N, direction="forward", kind=FFTPlan):
+        key = (kind.__name__, N, direction)
+        plan = self.plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self.plans.move_to_end(key)
+            return plan
+        self.misses += 1
+        plan = kind(N, direction)
+        self.plans[key] = plan
+        self._evict()
+        return plan
+
+    @property
+    def nbytes(self):
+        return sum(plan.nbytes for plan in self.plans.values())
+
+    @property
+    def work_nbytes(self):
+        return sum(plan.work_nbytes for plan in self.plans.values())
+
+    def _evict(self):
+        while len(self.plans) > 1 and self.nbytes > self.max_bytes:
+            self.plans.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.plans.clear()
+
+    def __repr__(self):
+        return (f"PlanCache(plans={len(self.plans)}, nbytes={self.nbytes}, work_nbytes={self.work_nbytes}, "
+                f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})")
+
+plan_cache = PlanCache()
+
+def make_plan(N, direction="forward"):
+    """取得長度 N 的轉換計畫 (經由全域 LRU 快取)"""
+    return plan_cache.get(N, direction)
+
+def make_real_plan(N, direction="forward"):
+    """取得長度 N 的實數訊號轉換計畫 (經由全域 LRU 快取)"""
+    return plan_cache.get(N, direction, RealFFTPlan)
+
+def fft(x):
+    """
+    沿最後一個軸做 DFT，x 可為 list 或形狀 (..., N) 的陣列
+    依長度選擇演算法：
+      2 的冪次     → radix-4 (必要時加一級 radix-2)
+      平滑長度     → 混合基數 (質因數 ≤ _MAX_RADIX)
+      含大質因數   → Bluestein
+    """
+    x = np.asarray(x, dtype=complex)
+    return make_plan(x.shape[-1], "forward")(x)
+
+def ifft(X):
+    """沿最後一個軸做逆 DFT (含 1/N 歸一化)"""
+    X = np.asarray(X, dtype=complex)
+    return make_plan(X.shape[-1], "inverse")(X)
+
+def rfft(x):
+    """實數訊號的 DFT，只回傳不重複的 N//2+1 個頻率"""
+    x = np.asarray(x, dtype=float)
+    return make_real_plan(x.shape[-1], "forward")(x)
+
+def irfft(X, n=None):
+    """rfft 的逆轉換，回傳實數陣列；n 為原訊號長度 (預設 2·(bins-1)，即偶數長度)"""
+    X = np.asarray(X, dtype=complex)
+    if n is None:
+        n = 2 * (X.shape[-1] - 1)
+    return make_real_plan(n, "inverse")(X[..., :n // 2 + 1])
+
+def dft(f):
+    """離散傅立葉正轉換 (FFT，O(N log N))"""
+    return fft(f)
+
+def idft(F, real=False):
+    """
+    離散傅立葉逆轉換 (FFT，O(N log N))
+    real=True 表示 F 是實數訊號的頻譜：只用前 N//2+1 個頻率重建，直接回傳實數陣列
+    """
+    if real:
+        F = np.asarray(F, dtype=complex)
+        return irfft(F[..., :F.shape[-1] // 2 + 1], F.shape[-1])
+    return ifft(F)
+
+# ==========================================
+# 串流處理：STFT 與長濾波器的 FFT 卷積
+# ==========================================
+# 所有函數都接受 1-D 陣列 / numpy.memmap，或任何會產生 1-D 區塊的可迭代物件，
+# 一次只在記憶體中保留一個區塊加上一個訊框 (或濾波器長度) 的重疊部分，
+# 因此記憶體用量與訊號總長度無關
+
+def iter_chunks(source, chunk_size=1 << 16):
+    """把訊號來源切成 float64 區塊；陣列 (含 memmap) 依 chunk_size 切片，可迭代物件則逐一轉換"""
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), chunk_size):
+            yield np.asarray(source[start:start + chunk_size], dtype=float)
+    else:
+        for chunk in source:
+            yield np.asarray(chunk, dtype=float).ravel()
+
+def _window(window, N):
+    """取得長度 N 的窗函數：'hann'、'hamming' (週期版本)、None 或自訂陣列"""
+    if window is None:
+        return np.ones(N)
+    if isinstance(window, str):
+        n = np.arange(N)
+        if window == "hann":
+            return 0.5 - 0.5 * np.cos(2 * np.pi * n / N)
+        if window == "hamming":
+            return 0.54 - 0.46 * np.cos(2 * np.pi * n / N)
+        raise ValueError(f"未知的窗函數: {window}")
+    window = np.asarray(window, dtype=float)
+    if window.shape != (N,):
+        raise ValueError(f"窗函數長度需為 {N}")
+    return window
+
+def stft(source, frame_size=1024, hop=256, window="hann", chunk_size=1 << 16):
+    """
+    串流短時傅立葉轉換：逐一產生每個訊框的 rfft 頻譜 (frame_size//2+1 個頻率)
+    第 j 個訊框涵蓋樣本 [j·hop, j·hop + frame_size)，最後不足一個訊框的尾巴捨去
+    每個區塊內的所有完整訊框一次批次轉換，再一個一個交出
+    """
+    w = _window(window, frame_size)
+    plan = make_real_plan(frame_size, "forward")
+    carry = np.empty(0)
+    skip = 0    # hop > frame_size 時，下一個訊框開頭之前尚未讀到、需要跳過的樣本數
+    for chunk in iter_chunks(source, chunk_size):
+        if skip:
+            dropped = min(skip, len(chunk))
+            chunk = chunk[dropped:]
+            skip -= dropped
+        buf = np.concatenate([carry, chunk])
+        if len(buf) < frame_size:
+            carry = buf
+            continue
+        count = (len(buf) - frame_size) // hop + 1
+        frames = np.lib.stride_tricks.sliding_window_view(buf, frame_size)[::hop][:count]
+        yield from plan(frames * w)
+        carry = buf[count * hop:]
+        skip = max(count * hop - len(buf), 0)
+
+def _conv_fft_size(M, fft_size):
+    """卷積用的 FFT 長度：預設取 ≥ 4M 的 2 的冪次，讓每塊有效輸出 L = N - M + 1 ≥ 3M"""
+    if fft_size is None:
+        fft_size = 1 << (4 * M - 1).bit_length()
+    if fft_size < 2 * M - 1:
+        raise ValueError(f"FFT 長度至少需為 2M-1 = {2 * M - 1}")
+    return fft_size
+
+def overlap_add(source, h, fft_size=None, chunk_size=1 << 16):
+    """
+    重疊相加 (overlap-add) 串流卷積，依序產生 y = x * h 的輸出區塊 (完整線性卷積)
+    輸入切成長度 L = N - M + 1 的區塊，各自補零到 N 後做 FFT 乘上濾波器頻譜，
+    相鄰區塊的輸出尾端 (M-1 個樣本) 重疊相加
+    """
+    h = np.asarray(h, dtype=float)
+    M = len(h)
+    N = _conv_fft_size(M, fft_size)
+    L = N - M + 1
+    H = rfft(np.concatenate([h, np.zeros(N - M)]))
+    forward, inverse = make_real_plan(N, "forward"), make_real_plan(N, "inverse")
+    pending = np.empty(0)        # 尚未湊滿 L 個樣本的輸入
+    tail = np.zeros(M - 1)       # 上一批區塊留下、需要加到下一段開頭的輸出
+
+    def convolve_blocks(blocks):
+        k = len(blocks)
+        padded = np.zeros((k, N))
+        padded[:, :blocks.shape[1]] = blocks
+        Y = inverse(forward(padded) * H)
+        # 第 j 塊輸出放在 j·L 開始；前 L 個樣本與尾端 M-1 個樣本分開相加
+        acc = np.zeros((k + 1) * L)
+        acc[:k * L] = Y[:, :L].ravel()
+        tails = np.zeros((k, L))
+        tails[:, :M - 1] = Y[:, L:]
+        acc[L:] += tails.ravel()
+        acc[:M - 1] += tail
+        return acc[:k * L], acc[k * L:k * L + M - 1]
+
+    total = 0
+    for chunk in iter_chunks(source, chunk_size):
+        total += len(chunk)
+        buf = np.concatenate([pending, chunk])
+        k = len(buf) // L
+        if k:
+            out, tail = convolve_blocks(buf[:k * L].reshape(k, L))
+            yield out
+        pending = buf[k * L:]
+    # 收尾：剩餘 p 個輸入的卷積長度為 p + M - 1，連同之前的尾端一起輸出
+    if len(pending):
+        out, rest = convolve_blocks(pending[None, :])
+        yield np.concatenate([out, rest])[:len(pending) + M - 1]
+    elif total:
+        yield tail
+
+def overlap_save(source, h, fft_size=None, chunk_size=1 << 16):
+    """
+    重疊保留 (overlap-save) 串流卷積，依序產生 y = x * h 的輸出區塊 (完整線性卷積)
+    每段取長度 N、彼此重疊 M-1 個樣本的輸入做循環卷積，丟掉前 M-1 個受循環影響的輸出
+    """
+    h = np.asarray(h, dtype=float)
+    M = len(h)
+    N = _conv_fft_size(M, fft_size)
+    L = N - M + 1
+    H = rfft(np.concatenate([h, np.zeros(N - M)]))
+    forward, inverse = make_real_plan(N, "forward"), make_real_plan(N, "inverse")
+    history = np.zeros(M - 1)    # 尚未用完的輸入，至少包含前一段最後 M-1 個 (一開始視為 0)
+
+    def segments(buf):
+        k = (len(buf) - (M - 1)) // L
+        if k <= 0:
+            return np.empty(0), buf
+        segs = np.lib.stride_tricks.sliding_window_view(buf[:(k - 1) * L + N], N)[::L]
+        Y = inverse(forward(segs) * H)
+        return Y[:, M - 1:].ravel(), buf[k * L:]
+
+    total = 0
+    for chunk in iter_chunks(source, chunk_size):
+        total += len(chunk)
+        out, history = segments(np.concatenate([history, chunk]))
+        if len(out):
+            yield out
+    if not total:
+        return
+    # 收尾：補零直到所有輸出 (共 total + M - 1 個) 都產生
+    produced = total - (len(history) - (M - 1))
+    need = total + M - 1 - produced
+    pad = np.zeros(need + (-need) % L)
+    out, _ = segments(np.concatenate([history, pad]))
+    yield out[:need]
+
 # --- 驗證邏輯 ---
 
 # 1. 定義一個原始函數 f (例如一個簡單的序列)
@@ -35,15 +573,96 @@ F_omega = dft(original_f)
 print("\n正轉換後的 F(ω) (前兩個點):")
 print(F_omega[:2])
 
-# 3. 執行逆轉換
-recovered_f = idft(F_omega)
+# 3. 執行逆轉換 (原訊號是實數，直接重建實數序列)
+recovered_f = idft(F_omega, real=True)
 
 # 4. 輸出結果與比對
 print("\n逆轉換回來的 f':")
-# 由於浮點數運算會有極小誤差，我們只取實部並四捨五入
-formatted_f = [round(x.real, 10) for x in recovered_f]
-print(formatted_f)
+print(recovered_f.tolist())
 
 # 驗證兩者是否相等
-is_same = all(abs(o - r.real) < 1e-10 for o, r in zip(original_f, recovered_f))
-print(f"\n驗證結果: {'成功' if is_same else '失敗'}")
\ No newline at end of file
+is_same = all(abs(o - r) < 1e-10 for o, r in zip(original_f, recovered_f))
+print(f"\n驗證結果: {'成功' if is_same else '失敗'}")
+
+# 5. 與原始雙層迴圈版本比對 (2 的冪次、平滑長度、質數長度)
+print("\n與 O(N^2) 版本比對:")
+rng = np.random.default_rng(0)
+for N in [16, 60, 97, 128, 210, 257]:
+    x = rng.standard_normal(N) + 1j * rng.standard_normal(N)
+    err_f = np.max(np.abs(dft(x) - np.array(dft_naive(list(x)))))
+    err_i = np.max(np.abs(idft(x) - np.array(idft_naive(list(x)))))
+    print(f"N = {N:>4} ({_factorize(N)}): 正轉換誤差 {err_f:.1e}, 逆轉換誤差 {err_i:.1e}")
+
+# 6. 效能測試：N = 2^4 ... 2^20 的來回轉換
+print("\n效能測試 (dft + idft 來回):")
+for e in range(4, 21):
+    N = 1 << e
+    x = rng.standard_normal(N)
+    start = time.perf_counter()
+    y = idft(dft(x))
+    elapsed = time.perf_counter() - start
+    err = np.max(np.abs(y - x))
+    print(f"N = 2^{e:<2} = {N:>8}: {elapsed * 1e3:9.3f} ms, 最大誤差 {err:.1e}")
+
+# 7. 實數訊號路徑：只算 N//2+1 個頻率
+print("\n實數訊號 rfft / irfft 與複數路徑比較:")
+for N in [1000, 1001, 1 << 16, 1 << 20]:
+    x = rng.standard_normal(N)
+    fft(x), rfft(x)  # 先建立計畫
+    start = time.perf_counter()
+    X_full = fft(x)
+    t_full = time.perf_counter() - start
+    start = time.perf_counter()
+    X_half = rfft(x)
+    t_half = time.perf_counter() - start
+    err = np.max(np.abs(X_half - X_full[:N // 2 + 1]))
+    err_back = np.max(np.abs(irfft(X_half, N) - x))
+    print(f"N = {N:>8}: 複數 {t_full * 1e3:8.3f} ms, 實數 {t_half * 1e3:8.3f} ms, "
+          f"輸出 {X_full.nbytes >> 10} KiB → {X_half.nbytes >> 10} KiB, 頻譜誤差 {err:.1e}, 重建誤差 {err_back:.1e}")
+
+# 8. 計畫重複使用：同長度的大量短訊框只在第一次建立計畫
+print("\n計畫快取 (10000 個長度 1024 的訊框):")
+plan = make_plan(1024, "forward")
+frame = rng.standard_normal(1024).astype(complex)
+out = np.empty(1024, dtype=complex)
+start = time.perf_counter()
+for _ in range(10000):
+    plan(frame, out=out)
+elapsed = time.perf_counter() - start
+print(f"每個訊框 {elapsed / 10000 * 1e6:.1f} µs, 與 np.fft 誤差 {np.max(np.abs(out - np.fft.fft(frame))):.1e}")
+print(plan_cache)
+
+# 9. 串流處理：memmap 上的 STFT 與長濾波器卷積
+print("\n串流 STFT / 卷積 (memmap):")
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "signal.f64")
+    total = 1 << 22
+    signal = np.memmap(path, dtype=float, mode="w+", shape=(total,))
+    t = np.arange(total)
+    signal[:] = np.sin(2 * np.pi * 0.05 * t) + 0.1 * rng.standard_normal(total)
+    signal.flush()
+    signal = np.memmap(path, dtype=float, mode="r", shape=(total,))
+
+    start = time.perf_counter()
+    peak = np.zeros(513)
+    count = 0
+    for spectrum in stft(signal, frame_size=1024, hop=256):
+        np.maximum(peak, np.abs(spectrum), out=peak)
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"STFT: {count} 個訊框, {elapsed:.2f} s, 最強頻率 bin = {np.argmax(peak)} (理論值 0.05·1024 ≈ 51)")
+    j = 1000
+    direct = np.fft.rfft(signal[j * 256:j * 256 + 1024] * _window("hann", 1024))
+    frame_j = next(f for i, f in enumerate(stft(signal[:(j + 8) * 256], 1024, 256)) if i == j)
+    print(f"第 {j} 個訊框與直接計算的誤差: {np.max(np.abs(frame_j - direct)):.1e}")
+
+    h = rng.standard_normal(4097)
+    x_small = signal[:200000]
+    expected = np.convolve(x_small, h)
+    for name, conv in [("overlap-add", overlap_add), ("overlap-save", overlap_save)]:
+        y = np.concatenate(list(conv(iter_chunks(x_small, 30011), h)))
+        print(f"{name:>12}: 長度 {len(y)} (應為 {len(expected)}), 與 np.convolve 誤差 {np.max(np.abs(y - expected)):.1e}")
+
+    start = time.perf_counter()
+    energy = sum(float(np.dot(block, block)) for block in overlap_save(signal, h))
+    print(f"overlap-save 處理 {total} 個樣本: {time.perf_counter() - start:.2f} s, 輸出能量 {energy:.3e}")
@@ -1,70 +1,280 @@
+import math
+import time
+import weakref
 import numpy as np
-from collections import Counter
+
+# 基底函數種類：實數根 x^m e^(αx)、複數根 x^m e^(αx)cos(βx) 與 x^m e^(αx)sin(βx)
+KIND_EXP, KIND_COS, KIND_SIN = 0, 1, 2
+
+def characteristic_roots(coefficients):
+    """
+    批次求特徵方程的根
+    coefficients: 形狀 (K, n+1) 的係數陣列，每列為 [a_n, a_{n-1}, ..., a_0]
+    將每列化為首一多項式後疊成 K 個 n×n 伴隨矩陣，只呼叫一次 eigvals
+    回傳形狀 (K, n) 的複數根
+    """
+    c = np.atleast_2d(np.asarray(coefficients, dtype=float))
+    if np.any(c[:, 0] == 0):
+        raise ValueError("最高次係數 a_n 不能為 0")
+    K, n = c.shape[0], c.shape[1] - 1
+    if n < 1:
+        return np.empty((K, 0), dtype=complex)
+    A = np.zeros((K, n, n))
+    A[:, 0, :] = -c[:, 1:] / c[:, :1]
+    A[:, np.arange(1, n), np.arange(n - 1)] = 1.0
+    return np.linalg.eigvals(A).astype(complex)
+
+def cluster_roots(roots, tol=1e-4):
+    """
+    以容許誤差將重根分群 (取代 round + Counter)
+    數值計算出的 m 重根會散開約 eps^(1/m) (相對於根的大小)，四捨五入可能剛好把它們切到不同的格子，
+    固定的容許誤差也接不住 m ≥ 4 的重根 (eps^(1/4) ≈ 1.2e-4)；因此容許誤差隨群的大小放寬：
+        R(m) = max(tol, 10·eps^(1/m))
+    第 i 個根與離它最近的 m-1 個根 (相對距離，以 max(1, |r|) 為尺度) 都在 R(m) 之內時，
+    視為 m 重根的候選，取符合條件的最大 m；候選群內的根彼此相連，取連通分量 (遞移閉包) 為同一群，
+    再以群內平均值代表該根 (散開的誤差彼此抵銷，平均值比個別的根準確得多)
+    虛部 ≤ tol·max(1, |r|) 的根 (分群前的個別根與分群後的平均值) 取實部：
+    接近臨界阻尼時散開成 α ± εi 的重根，共軛的兩個根因此落在同一點並合併成一個實數重根，
+    而不是兩個相同的實數單根；實數重根散開後的平均值也不會留下殘餘的虛部
+    回傳 (平均後的根, 每個根所屬群的大小, 每個根在群內的序號 0..m-1)，形狀皆為 (K, n)
+    """
+    roots = np.asarray(roots, dtype=complex)
+    near_real = np.abs(roots.imag) <= tol * np.maximum(1.0, np.abs(roots))
+    roots = np.where(near_real, roots.real, roots)
+    K, n = roots.shape
+    if n == 0:
+        return roots, np.zeros((K, 0), dtype=int), np.zeros((K, 0), dtype=int)
+    scale = np.maximum(1.0, np.maximum(np.abs(roots)[:, :, None], np.abs(roots)[:, None, :]))
+    dist = np.abs(roots[:, :, None] - roots[:, None, :]) / scale
+    # nearest[k, i, m-1]：第 i 個根到第 m-1 近的根的距離 (m = 1 為自己，距離 0)
+    nearest = np.sort(dist, axis=-1)
+    radius = np.maximum(tol, 10 * np.finfo(float).eps ** (1 / np.arange(1, n + 1)))
+    fits = nearest < radius
+    size = n - np.argmax(fits[..., ::-1], axis=-1)
+    reach = np.take_along_axis(nearest, size[..., None] - 1, axis=-1)
+    linked = dist <= reach
+    linked |= linked.swapaxes(1, 2)
+    # 反覆平方直到遞移閉包穩定 (最多 log2(n) 次)
+    while True:
+        closed = (linked.astype(float) @ linked.astype(float)) > 0
+        if np.array_equal(closed, linked):
+            break
+        linked = closed
+    multiplicity = linked.sum(axis=-1)
+    mean = (linked.astype(complex) @ roots[:, :, None])[:, :, 0] / multiplicity
+    mean = np.where(np.abs(mean.imag) <= tol * np.maximum(1.0, np.abs(mean)), mean.real, mean)
+    rank = (linked & np.tri(n, k=-1, dtype=bool)).sum(axis=-1)
+    return mean, multiplicity, rank
+
+class TimeGrid:
+    """
+    固定的時間網格：預先算好 x^m (m = 0..max_power)，並快取各批通解在此網格上的基底矩陣，
+    同一個網格可以重複用來評估許多 ODE 與許多組初始條件
+    快取以 weakref 指向各批通解，批次被回收時對應的基底矩陣一併釋放
+    """
+
+    def __init__(self, x, max_power=0):
+        self.x = np.asarray(x, dtype=float).ravel()
+        self.powers = self.x[:, None] ** np.arange(max_power + 1)
+        self._cache = weakref.WeakKeyDictionary()
+
+    def power_table(self, max_power):
+        """取得 x^0..x^max_power 的表 (T, max_power+1)，不夠時才補算"""
+        if self.powers.shape[1] <= max_power:
+            self.powers = self.x[:, None] ** np.arange(max_power + 1)
+        return self.powers
+
+    def basis(self, batch):
+        """batch 在此網格上的基底矩陣 (K, T, n)，同一批只計算一次"""
+        B = self._cache.get(batch)
+        if B is None:
+            B = self._cache[batch] = batch.basis(self)
+        return B
+
+class SolutionBatch:
+    """
+    K 個常係數齊次 ODE 的通解，以陣列形式保存，每個系統恰有 n 個基底函數：
+        y(x) = Σ_j C_j · x^power[j] · e^(alpha[j]·x) · {1, cos(beta[j]·x), sin(beta[j]·x)}[kind[j]]
+    roots / multiplicities: 分群後的特徵根與重數 (K, n)
+    alpha / beta / power / kind: 基底函數參數 (K, n)，排序方式與原本字串輸出相同
+    只有在呼叫 render 時才組出字串；basis / evaluate / fit_initial 做數值計算
+    """
+
+    def __init__(self, coefficients, roots, multiplicities, alpha, beta, power, kind):
+        self.coefficients = coefficients
+        self.roots = roots
+        self.multiplicities = multiplicities
+        self.alpha = alpha
+        self.beta = beta
+        self.power = power
+        self.kind = kind
+
+    def __len__(self):
+        return len(self.alpha)
+
+    def __getitem__(self, i):
+        return GeneralSolution(self, i)
+
+    def basis(self, x):
+        """
+        在 x 上一次算出所有基底函數值，回傳 (K, T, n)
+        x 可為陣列或 TimeGrid (重複使用預先算好的 x^m 與快取)
+        """
+        if isinstance(x, TimeGrid):
+            pw = x.power_table(int(self.power.max(initial=0)))[:, self.power]   # (T, K, n)
+            x = x.x
+            pw = pw.transpose(1, 0, 2)
+        else:
+            x = np.asarray(x, dtype=float).ravel()
+            pw = x[None, :, None] ** self.power[:, None, :]
+        phase = self.beta[:, None, :] * x[None, :, None]
+        # 實數根 beta = 0，cos(0) = 1，正好就是 e^(αx) 本身
+        trig = np.where((self.kind == KIND_SIN)[:, None, :], np.sin(phase), np.cos(phase))
+        return pw * np.exp(self.alpha[:, None, :] * x[None, :, None]) * trig
+
+    def evaluate(self, x, C):
+        """
+        y(x) = Σ_j C_j·φ_j(x)，C 形狀 (K, n) (或 (K, n, R) 一次評估 R 組常數)
+        x 為陣列或 TimeGrid，回傳 (K, T) (或 (K, T, R))
+        """
+        B = x.basis(self) if isinstance(x, TimeGrid) else self.basis(x)
+        C = np.asarray(C, dtype=float)
+        if C.ndim == 2:
+            return (B @ C[:, :, None])[:, :, 0]
+        return B @ C
+
+    def derivative_matrix(self, x0=0.0):
+        """
+        各基底函數在 x0 的 0..n-1 階導數 W[k, d, j] = φ_j^(d)(x0)，形狀 (K, n, n)
+        以 λ = α + βi 寫成 x^m·e^(λx)，其 d 階導數為
+            Σ_q C(d, q)·m!/(m-q)!·x^(m-q)·λ^(d-q)·e^(λx)
+        cos / 實數根取實部，sin 取虛部
+        """
+        K, n = self.alpha.shape
+        x0 = np.broadcast_to(np.asarray(x0, dtype=float), (K,))[:, None]
+        lam = self.alpha + 1j * self.beta
+        m = self.power
+        e = np.exp(lam * x0)
+        W = np.zeros((K, n, n), dtype=complex)
+        for d in range(n):
+            falling = np.ones_like(m, dtype=float)     # m·(m-1)···(m-q+1)
+            for q in range(d + 1):
+                mask = m >= q
+                x_pow = np.where(mask, x0 ** np.maximum(m - q, 0), 0.0)
+                W[:, d, :] += math.comb(d, q) * falling * x_pow * lam ** (d - q) * e
+                falling = falling * (m - q)
+        return np.where((self.kind == KIND_SIN)[:, None, :], W.imag, W.real)
+
+    def fit_initial(self, y0, x0=0.0):
+        """
+        由初始條件 y(x0), y'(x0), ..., y^(n-1)(x0) 求出常數 C_1..C_n
+        y0 形狀 (K, n) (或 (n,) 表示所有系統相同)，所有系統合成一次批次線性求解
+        """
+        K, n = self.alpha.shape
+        y0 = np.broadcast_to(np.asarray(y0, dtype=float), (K, n))
+        try:
+            return np.linalg.solve(self.derivative_matrix(x0), y0[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            raise ValueError("初始條件的線性系統為奇異 (基底函數在 x0 線性相關)，無法決定常數") from None
+
+    def render(self, i):
+        """第 i 個系統的通解字串"""
+        terms = []
+        for j, (a, b, m, k) in enumerate(zip(self.alpha[i], self.beta[i], self.power[i], self.kind[i]), 1):
+            # 僅顯示時四捨五入；加 0.0 避免印出 -0.0
+            a, b = round(float(a), 6) + 0.0, round(float(b), 6) + 0.0
+            x_pow = f"x^{m}" if m > 1 else ("x" if m == 1 else "")
+            if k == KIND_EXP:
+                terms.append(f"C_{j}{x_pow}e^({a}x)")
+            else:
+                # 處理 e^(alpha*x) 的顯示，若 alpha 為 0 則省略
+                e_part = f"e^({a}x)" if abs(a) > 1e-6 else ""
+                trig = "cos" if k == KIND_COS else "sin"
+                terms.append(f"C_{j}{x_pow}{e_part}{trig}({b}x)")
+        return "y(x) = " + " + ".join(terms)
+
+class GeneralSolution:
+    """
+    單一 ODE 的通解 (SolutionBatch 中的第 i 個)
+    str() 為通解字串；solution(x, C) 以向量化方式計算 y(x)
+    """
+
+    def __init__(self, batch, i):
+        self.batch = batch
+        self.i = i
+
+    def __str__(self):
+        return self.batch.render(self.i)
+
+    __repr__ = __str__
+
+    def basis(self, x):
+        """基底函數矩陣 (T, n)"""
+        return self._row().basis(x)[0]
+
+    def fit_initial(self, y0, x0=0.0):
+        """由 y(x0), y'(x0), ..., y^(n-1)(x0) 求出常數 C (n,)"""
+        return self._row().fit_initial(np.asarray(y0, dtype=float)[None, :], x0)[0]
+
+    def __call__(self, x, C):
+        x = np.asarray(x, dtype=float)
+        return (self.basis(x.ravel()) @ np.asarray(C, dtype=float)).reshape(x.shape)
+
+    def _row(self):
+        b, i = self.batch, slice(self.i, self.i + 1)
+        return SolutionBatch(b.coefficients[i], b.roots[i], b.multiplicities[i],
+                             b.alpha[i], b.beta[i], b.power[i], b.kind[i])
+
+def solve_ode_batch(coefficients, tol=1e-4):
+    """
+    批次求解常係數齊次常微分方程
+    coefficients: 形狀 (K, n+1) 的實數係數陣列，每列為 [a_n, a_{n-1}, ..., a_0]
+    所有系統開頭共同的 0 係數會被捨去 (降階)
+    回傳 SolutionBatch
+    """
+    c = np.atleast_2d(np.asarray(coefficients, dtype=float))
+    # 與 np.roots 相同，捨去開頭的 0 係數 (所有系統共同的部分；個別系統仍有 a_n = 0 時由 characteristic_roots 報錯)
+    nonzero = np.any(c != 0, axis=0)
+    if nonzero.any():
+        c = c[:, np.argmax(nonzero):]
+    roots, mult, rank = cluster_roots(characteristic_roots(c), tol)
+    K, n = roots.shape
+
+    # 情況 A: 實數根 (虛部極小)；情況 B: 複數共軛根 α ± βi
+    # 實係數的複數根必成對出現，只用 β > 0 的那一個同時產生 cos 與 sin
+    is_real = np.abs(roots.imag) <= tol * np.maximum(1.0, np.abs(roots))
+    upper = ~is_real & (roots.imag > 0)
+    alpha = np.repeat(roots.real, 2, axis=1)
+    beta = np.repeat(np.where(is_real, 0.0, np.abs(roots.imag)), 2, axis=1)
+    power = np.repeat(rank, 2, axis=1)
+    kind = np.tile([KIND_COS, KIND_SIN], (K, n))
+    kind[:, 0::2][is_real] = KIND_EXP
+    valid = np.zeros((K, 2 * n), dtype=bool)
+    valid[:, 0::2] = is_real | upper
+    valid[:, 1::2] = upper
+
+    # 排序：有效的在前；根依 (實部, 虛部) 由大到小，同一根依 x 的次方、cos 先於 sin
+    # (lexsort 以最後一個鍵為主鍵)
+    order = np.lexsort((kind, power, -beta, -alpha, ~valid), axis=-1)[:, :n]
+    take = lambda a: np.take_along_axis(a, order, axis=1)
+    if not np.all(take(valid)):
+        raise ValueError("特徵根不符合實係數的共軛成對結構")
+    root_order = np.lexsort((-roots.imag, -roots.real), axis=-1)
+    return SolutionBatch(
+        c,
+        np.take_along_axis(roots, root_order, axis=1),
+        np.take_along_axis(mult, root_order, axis=1),
+        take(alpha), take(beta), take(power), take(kind),
+    )
 
 def solve_ode_general(coefficients):
     """
     求解常係數齊次常微分方程 (Linear Homogeneous ODE with Constant Coefficients)
     coefficients: 係數列表 [a_n, a_{n-1}, ..., a_0]
+    回傳 GeneralSolution：print 時顯示通解字串，也可以直接對 x 陣列求值
+    開頭的 0 係數會被捨去 (與 np.roots 相同)
     """
-    # 1. 求解特徵方程的根 (characteristic equation: a_n*r^n + ... + a_0 = 0)
-    roots = np.roots(coefficients)
-    
-    # 2. 處理浮點數誤差：將非常接近 0 的虛部或實部捨去，並對根進行四捨五入以便統計重根
-    # 使用 round 定義精度，避免因為 2.000000000001 和 1.999999999999 被視為不同根
-    rounded_roots = [complex(round(r.real, 6), round(r.imag, 6)) for r in roots]
-    
-    # 3. 統計每個根出現的次數（重數）
-    root_counts = Counter(rounded_roots)
-    
-    # 儲存結果字串的列表
-    terms = []
-    c_index = 1
-    
-    # 為了處理複數共軛對，我們記錄已經處理過的根
-    processed_roots = set()
-    
-    # 排序根，讓輸出結果較美觀（先實部後虛部）
-    unique_roots = sorted(root_counts.keys(), key=lambda x: (x.real, x.imag), reverse=True)
-
-    for r in unique_roots:
-        if r in processed_roots:
-            continue
-            
-        real_part = r.real
-        imag_part = r.imag
-        multiplicity = root_counts[r]
-        
-        # 情況 A: 實數根 (虛部極小)
-        if abs(imag_part) < 1e-6:
-            for m in range(multiplicity):
-                x_pow = f"x^{m}" if m > 1 else ("x" if m == 1 else "")
-                terms.append(f"C_{c_index}{x_pow}e^({real_part}x)")
-                c_index += 1
-            processed_roots.add(r)
-            
-        # 情況 B: 複數共軛根 (alpha +/- beta*i)
-        else:
-            # 尋找對應的共軛根
-            conj_r = complex(real_part, -imag_part)
-            # 在複數平面，我們只處理正虛部的那一個，一次生成 sin 和 cos
-            if imag_part > 0:
-                beta = imag_part
-                alpha = real_part
-                
-                for m in range(multiplicity):
-                    x_pow = f"x^{m}" if m > 1 else ("x" if m == 1 else "")
-                    # 處理 e^(alpha*x) 的顯示，若 alpha 為 0 則省略
-                    e_part = f"e^({alpha}x)" if abs(alpha) > 1e-6 else ""
-                    
-                    terms.append(f"C_{c_index}{x_pow}{e_part}cos({beta}x)")
-                    c_index += 1
-                    terms.append(f"C_{c_index}{x_pow}{e_part}sin({beta}x)")
-                    c_index += 1
-                
-                processed_roots.add(r)
-                processed_roots.add(conj_r)
-
-    return "y(x) = " + " + ".join(terms)
+    return solve_ode_batch([coefficients])[0]
 
 # --- 以下是測試主程式 ---
 if __name__ == "__main__":
@@ -96,4 +306,41 @@ if __name__ == "__main__":
     print("\n--- 高階重根範例 ---")
     coeffs5 = [1, -6, 12, -8]
     print(f"方程係數: {coeffs5}")
-    print(solve_ode_general(coeffs5))
\ No newline at end of file
+    print(solve_ode_general(coeffs5))
+    # 四重根與五重根散開約 eps^(1/4)、eps^(1/5)，超過固定的容許誤差，仍應合併為一個根
+    for coeffs in ([1, -8, 24, -32, 16], [1, 5, 10, 10, 5, 1]):
+        print(f"方程係數: {coeffs}")
+        print(solve_ode_general(coeffs))
+
+    # 批次求解：參數掃描 y'' + 2ζy' + y = 0，一次求 20 萬個系統
+    print("\n--- 批次求解範例 ---")
+    zeta = np.linspace(0, 2, 200001)
+    batch_coeffs = np.column_stack([np.ones_like(zeta), 2 * zeta, np.ones_like(zeta)])
+    start = time.perf_counter()
+    batch = solve_ode_batch(batch_coeffs)
+    print(f"{len(batch)} 個系統耗時 {time.perf_counter() - start:.2f} s")
+    for i in [0, 50000, 100000, 200000]:
+        print(f"ζ = {zeta[i]:.2f}: {batch.render(i)}")
+
+    # 數值求值：y'' + y = 0，y(0) = 1，y'(0) = 0 → y = cos(x)
+    print("\n--- 初始值求解與數值求值 ---")
+    sol = solve_ode_general(coeffs3[:1] + [0, 1])
+    C = sol.fit_initial([1.0, 0.0])
+    xs = np.linspace(0, 10, 1001)
+    print(f"{sol}, C = {C}, max |y - cos(x)| = {np.max(np.abs(sol(xs, C) - np.cos(xs))):.1e}")
+    # 高階重根：(D - 2)^3 y = 0，y(0) = 0, y'(0) = 0, y''(0) = 2 → y = x^2 e^(2x)
+    sol5 = solve_ode_general(coeffs5)
+    C5 = sol5.fit_initial([0.0, 0.0, 2.0])
+    print(f"{sol5}, C = {np.round(C5, 12) + 0.0}, max 相對誤差 = "
+          f"{np.max(np.abs(sol5(xs, C5) / (xs**2 * np.exp(2 * xs) + 1e-300) - 1)[1:]):.1e}")
+
+    # 同一個時間網格重複用於一批 ODE：全部從 y(0) = 1, y'(0) = 0 出發
+    grid = TimeGrid(np.linspace(0, 20, 400), max_power=1)
+    sub = solve_ode_batch(batch_coeffs[::20])
+    start = time.perf_counter()
+    Y = sub.evaluate(grid, sub.fit_initial([1.0, 0.0]))
+    print(f"{len(sub)} 個系統 × {len(grid.x)} 個時間點: {time.perf_counter() - start:.2f} s, "
+          f"y(0) 最大誤差 {np.max(np.abs(Y[:, 0] - 1)):.1e}")
+    exact = np.exp(-0.5 * grid.x) * (np.cos(np.sqrt(0.75) * grid.x) + 0.5 / np.sqrt(0.75) * np.sin(np.sqrt(0.75) * grid.x))
+    print(f"ζ = 0.5 與解析解的誤差: {np.max(np.abs(Y[2500] - exact)):.1e}")
+
@@ -1,4 +1,5 @@
 import cmath
+import numpy as np
 
 def root2(a, b, c):
     """
@@ -14,6 +15,28 @@ def root2(a, b, c):
     
     return sol1, sol2
 
+def root2_array(a, b, c):
+    """
+    批次求解大量二次方程 a·x^2 + b·x + c = 0 (a, b, c 可為任意可廣播的實數陣列)
+    回傳形狀 (..., 2) 的複數陣列，不存在的根以 nan 表示
+    使用 citardauq 形式避免 b^2 >> 4ac 時 -b ± √D 的相減抵銷：
+        q = -(b + sign(b)·√D) / 2，x1 = q / a，x2 = c / q
+    a == 0 (退化為一次方程) 與 a == b == 0 (無解) 以遮罩處理，不用分支
+    """
+    a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_d = np.sqrt((b * b - 4 * a * c).astype(complex))
+        sign = np.where(b < 0, -1.0, 1.0)
+        q = -0.5 * (b + sign * sqrt_d)
+        x1 = q / a
+        # q == 0 只會發生在 b == 0 且 D == 0 (即 c == 0)，兩根皆為 0
+        x2 = np.where(q == 0, 0, c / q)
+        linear = a == 0
+        x1 = np.where(linear, -c / b, x1)
+        x2 = np.where(linear, np.nan, x2)
+        x1 = np.where(linear & (b == 0), np.nan, x1)
+    return np.stack([x1, x2], axis=-1)
+
 # --- 驗證與測試 ---
 
 def verify_roots(a, b, c):
@@ -37,4 +60,14 @@ def verify_roots(a, b, c):
 verify_roots(1, -3, 2)  # x^2 - 3x + 2 = 0, 根應該是 2, 1
 
 # 測試 2: 複數根 (b^2 - 4ac < 0)
-verify_roots(1, 1, 1)   # x^2 + x + 1 = 0
\ No newline at end of file
+verify_roots(1, 1, 1)   # x^2 + x + 1 = 0
+
+# 測試 3: 批次求解 (含 b^2 >> 4ac 的抵銷情況與 a = 0 的退化情況)
+a = np.array([1.0, 1.0, 1.0, 0.0, 0.0])
+b = np.array([-3.0, 1.0, 1e8, 2.0, 0.0])
+c = np.array([2.0, 1.0, 1.0, -4.0, 1.0])
+print("批次求解:")
+print(root2_array(a, b, c))
+print(f"x^2 + 1e8 x + 1 = 0 的小根: 穩定形式 {root2_array(1, 1e8, 1)[1].real:.15e}, "
+      f"原公式 {root2(1, 1e8, 1)[0].real:.15e} (真值約 -1.000000000000000e-08)")
+
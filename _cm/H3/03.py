@@ -1,4 +1,7 @@
 import cmath
+import time
+from itertools import product
+import numpy as np
 
 def root3(a, b, c, d):
     if a == 0:
@@ -47,6 +50,120 @@ def solve_quadratic(a, b, c):
     d = cmath.sqrt(b**2 - 4*a*c)
     return [(-b + d) / (2*a), (-b - d) / (2*a)]
 
+# ==========================================
+# 批次版本：一次求解大量多項式
+# ==========================================
+def _quadratic_real(a, b, c):
+    """
+    二次方程 a·x^2 + b·x + c = 0 的 citardauq 核心，全部為實數陣列運算，回傳 (r1, r2, im)
+    判別式 ≥ 0：兩個實根 q / a 與 c / q，q = -(b + sign(b)·√D) / 2 (im = 0)
+    判別式 < 0：共軛複根 r1 + i·im 與 r2 - i·im (r1 == r2 == -b/2a)
+    呼叫端負責 errstate 與 a == 0 的遮罩
+    """
+    disc = b * b - 4 * a * c
+    real = disc >= 0
+    sq = np.sqrt(np.abs(disc))
+    q = -0.5 * (b + np.copysign(sq, b))
+    half = -0.5 * b / a
+    r1 = np.where(real, q / a, half)
+    # q == 0 只會發生在 b == 0 且 D == 0 (即 c == 0)，兩根皆為 0
+    r2 = np.where(real, np.where(q == 0, 0, c / q), half)
+    im = np.where(real, 0, 0.5 * sq / np.abs(a))
+    return r1, r2, im
+
+def solve_quadratic_array(a, b, c):
+    """
+    批次二次方程 (citardauq 穩定形式)，回傳 (..., 2) 複數陣列，不存在的根為 nan
+    a == 0 退化為一次方程 -c / b，a == b == 0 無解，皆以遮罩處理
+    """
+    a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c)))
+    roots = np.empty(a.shape + (2,), dtype=complex)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r1, r2, im = _quadratic_real(a, b, c)
+        linear = a == 0
+        roots.real[..., 0] = np.where(linear, np.where(b == 0, np.nan, -c / b), r1)
+        roots.imag[..., 0] = np.where(linear, 0, im)
+        roots.real[..., 1] = np.where(linear, np.nan, r2)
+        roots.imag[..., 1] = np.where(linear, 0, -im)
+    return roots
+
+# 每次處理的區塊大小：讓中間陣列留在快取中，並避免反覆配置大塊記憶體
+_CHUNK = 8192
+
+def _root3_block(a, b, c, d, out):
+    """root3_array 的核心：處理一個 1-D 區塊 (a ≠ 0)，結果寫入 out (n, 3)"""
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        inv = 1 / a
+        B, C, D = b * inv, c * inv, d * inv
+        # x = t + s，s = -B/3：t^3 + p·t + q = 0，p/3 = C/3 - s^2，q = s·(C - 2s^2) + D
+        s = B * (-1 / 3)
+        s2 = s * s
+        p3 = C * (1 / 3) - s2
+        q = s * (C - 2 * s2) + D
+        delta = 0.25 * q * q + p3 * p3 * p3
+
+        # Δ ≥ 0：Cardano
+        u = np.cbrt(-0.5 * q - np.copysign(np.sqrt(np.maximum(delta, 0)), q))
+        x1 = u - np.where(u == 0, 0, p3 / u)
+        # Δ < 0：三角函數法 (只對這些項計算)；k = 0 給最大的 t，k = 2 給最小的 t，取與 s 同號者
+        trig = np.flatnonzero(delta < 0)
+        if trig.size:
+            pt, qt, st = p3[trig], q[trig], s[trig]
+            m = 2 * np.sqrt(-pt)
+            theta = np.arccos(np.clip(qt / (pt * m), -1, 1)) * (1 / 3)
+            x1[trig] = m * np.cos(theta - np.where(st < 0, 4 * np.pi / 3, 0))
+        x1 += s
+
+        # 一次 Newton 修正 x1 (首一多項式 x^3 + Bx^2 + Cx + D)
+        f = ((x1 + B) * x1 + C) * x1 + D
+        df = (3 * x1 + 2 * B) * x1 + C
+        x1 -= np.where(df != 0, f / df, 0)
+
+        # 除掉 (x - x1) 得到 x^2 + βx + γ；|x1|^3 > |D| 表示 x1 比另兩根的幾何平均大，由常數項往回除
+        # x1 相對於根的尺度可忽略時 (例如 D == 0 時的捨入殘值) 必須往下除，否則除以 x1 會爆掉；
+        # D == 0 時 0 是精確的根，直接取 x1 = 0
+        scale = np.abs(B) + np.sqrt(np.abs(C)) + np.cbrt(np.abs(D))
+        negligible = np.abs(x1) <= 1e-8 * scale
+        x1 = np.where(negligible & (D == 0), 0.0, x1)
+        backward = (np.abs(x1 * x1 * x1) > np.abs(D)) & ~negligible
+        gamma_b = -D / x1
+        beta = np.where(backward, (gamma_b - C) / x1, B + x1)
+        gamma = np.where(backward, gamma_b, C + beta * x1)
+        x2, x3, y2 = _quadratic_real(1.0, beta, gamma)
+
+    o = out.view(float).reshape(-1, 3, 2)
+    o[:, 0, 0], o[:, 0, 1] = x1, 0
+    o[:, 1, 0], o[:, 1, 1] = x2, y2
+    o[:, 2, 0], o[:, 2, 1] = x3, -y2
+
+def root3_array(a, b, c, d):
+    """
+    批次求解三次方程 a·x^3 + b·x^2 + c·x + d = 0 (係數為可廣播的實數陣列)
+    回傳形狀 (..., 3) 的複數陣列；a == 0 的項以遮罩退化為二次方程，多出的根為 nan
+    1. 化為 t^3 + p·t + q = 0，依判別式 Δ = (q/2)^2 + (p/3)^3 求出一個實根 x1：
+       Δ < 0 (三個相異實根)：三角函數法 t = 2√(-p/3)·cos(θ/3 - 2πk/3)，
+             取與平移量 -B/3 同號的那一個，x1 即為絕對值最大的根，不會相減抵銷
+       Δ ≥ 0：實數立方根的 Cardano 公式，u 取 -q/2 與 √Δ 同號相加的那一個，v = -p/(3u)
+    2. 對 x1 做一次 Newton 修正
+    3. 除掉 (x - x1) 得到二次式：x1 較大時由常數項往回除 (backward deflation)，
+       較小時由最高次項往下除，兩者都是數值穩定的方向；再以 citardauq 形式求另外兩根
+       (與 solve_quadratic_array 共用同一個 _quadratic_real 核心)
+    全部以實數陣列運算，分成 _CHUNK 大小的區塊處理，最後才寫成複數結果
+    """
+    a, b, c, d = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c, d)))
+    shape = a.shape
+    a, b, c, d = (np.ravel(v) for v in (a, b, c, d))
+    roots = np.empty((a.size, 3), dtype=complex)
+    for i in range(0, a.size, _CHUNK):
+        block = slice(i, i + _CHUNK)
+        _root3_block(a[block], b[block], c[block], d[block], roots[block])
+    # a == 0：退化為二次方程，只重算這些項
+    quad = np.flatnonzero(a == 0)
+    if quad.size:
+        roots[quad, :2] = solve_quadratic_array(b[quad], c[quad], d[quad])
+        roots[quad, 2] = np.nan
+    return roots.reshape(shape + (3,))
+
 # --- 測試範例 ---
 # 範例：x^3 - 6x^2 + 11x - 6 = 0 (根應為 1, 2, 3)
 results = root3(1, -6, 11, -6)
@@ -55,4 +172,58 @@ for i, r in enumerate(results, 1):
     # 格式化輸出，去除極小的虛部數值
     real = round(r.real, 10)
     imag = round(r.imag, 10)
-    print(f"x{i} = {complex(real, imag)}")
\ No newline at end of file
+    print(f"x{i} = {complex(real, imag)}")
+
+# --- 批次求解與效能比較 ---
+# 1. 與逐一呼叫 root3 的結果比對 (隨機實係數，含 a = 0 的退化情況)
+rng = np.random.default_rng(0)
+n = 200000
+coeffs = rng.standard_normal((4, n))
+coeffs[0, :10] = 0
+batch = root3_array(*coeffs)
+# 相對殘差 |f(x)| / Σ|a_i·x^i| (向後誤差)
+powers = np.abs(batch[10:].T) ** np.arange(3, -1, -1)[:, None, None]
+residual = np.abs(np.polyval(coeffs[:, None, 10:], batch[10:].T)) / np.sum(np.abs(coeffs[:, None, 10:]) * powers, axis=0)
+print(f"\n批次求解 {n} 個三次方程，最大相對殘差 = {np.max(residual):.1e}")
+print(f"a = 0 的退化情況 (第 0 組): {batch[0]}, 逐一求解: {root3(*coeffs[:, 0])}")
+
+# 2. 三個實根的情況：三角函數法 vs 原本的複數 Cardano
+tri = root3_array(1, -6, 11, -6)
+print(f"x^3 - 6x^2 + 11x - 6 = 0 的批次結果: {tri} (虛部皆為 0)")
+
+# 3. 回歸檢查：根取自 -3..3 的所有組合 (含 0 根、二重根與三重根)，與 d = 0 的隨機三次式
+exact = np.array(list(product(range(-3, 4), repeat=3)), dtype=float)
+int_coeffs = np.array([np.poly(r) for r in exact]).T
+found = np.sort_complex(root3_array(*int_coeffs))
+int_err = np.max(np.abs(found - np.sort_complex(exact.astype(complex))), axis=1)
+# m 重根的誤差約為 eps^(1/m)，三重根約 1e-5
+print(f"{len(exact)} 個整數根三次方程: 最大誤差 {np.max(int_err):.1e}，誤差 > 1e-4 的有 {np.sum(int_err > 1e-4)} 個；"
+      f"x^3 - 2x^2 + x = 0 → {root3_array(1, -2, 1, 0)}")
+zero_coeffs = coeffs.copy()
+zero_coeffs[3] = 0
+zero_roots = root3_array(*zero_coeffs[:, 10:])
+powers = np.abs(zero_roots.T) ** np.arange(3, -1, -1)[:, None, None]
+with np.errstate(invalid="ignore"):
+    # 精確的 0 根殘差為 0/0，以 nanmax 略過
+    residual = np.abs(np.polyval(zero_coeffs[:, None, 10:], zero_roots.T)) / np.sum(np.abs(zero_coeffs[:, None, 10:]) * powers, axis=0)
+print(f"d = 0 的隨機三次方程: 最大相對殘差 = {np.nanmax(residual):.1e}")
+
+# 4. 吞吐量：root3 迴圈 vs root3_array
+#    迴圈分兩種：直接以索引取 NumPy 陣列的元素 (係數存在陣列中的一般用法)，以及先轉成 Python float
+loop_n = 20000
+start = time.perf_counter()
+for i in range(loop_n):
+    root3(coeffs[0, i], coeffs[1, i], coeffs[2, i], coeffs[3, i])
+t_loop_np = (time.perf_counter() - start) / loop_n
+loop_coeffs = coeffs[:, :loop_n].T.tolist()
+start = time.perf_counter()
+for row in loop_coeffs:
+    root3(*row)
+t_loop_py = (time.perf_counter() - start) / loop_n
+start = time.perf_counter()
+root3_array(*coeffs)
+t_array = (time.perf_counter() - start) / n
+print(f"root3 迴圈 (NumPy 元素): {1 / t_loop_np:>12,.0f} 個/秒")
+print(f"root3 迴圈 (Python float): {1 / t_loop_py:>10,.0f} 個/秒")
+print(f"root3_array:             {1 / t_array:>12,.0f} 個/秒 "
+      f"(加速 {t_loop_np / t_array:.0f} 倍 / {t_loop_py / t_array:.0f} 倍，目標為 NumPy 元素迴圈的 50 倍)")
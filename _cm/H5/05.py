@@ -1,105 +1,402 @@
 import math
+import time
+import numpy as np
 
 # ==========================================
 # 1. 有限體元素類別 (類似 rational_number.py)
 # ==========================================
 class Fp:
-    p = 13  # 定義模數 (需為質數)
+    # 每個元素自帶模數 p，不同的體互不干擾；__slots__ 省去每個物件的 __dict__
+    __slots__ = ("value", "p")
 
-    def __init__(self, value):
+    def __init__(self, value, p=13):
         if isinstance(value, Fp):
-            self.value = value.value
+            self.value, self.p = value.value, value.p
         else:
-            self.value = value % Fp.p
+            self.p = p  # 定義模數 (需為質數)
+            self.value = value % p
+
+    def _coerce(self, other):
+        # 整數以本身的模數轉換；兩個 Fp 必須屬於同一個體
+        if isinstance(other, Fp):
+            if other.p != self.p:
+                raise ValueError(f"不同體的元素不能運算: F_{self.p} 與 F_{other.p}")
+            return other.value
+        return other % self.p
 
     def __add__(self, other):
-        return Fp(self.value + Fp(other).value)
+        return Fp(self.value + self._coerce(other), self.p)
 
     def __sub__(self, other):
-        return Fp(self.value - Fp(other).value)
+        return Fp(self.value - self._coerce(other), self.p)
 
     def __mul__(self, other):
-        return Fp(self.value * Fp(other).value)
+        return Fp(self.value * self._coerce(other), self.p)
+
+    __radd__, __rmul__ = __add__, __mul__
+
+    def __rsub__(self, other):
+        return Fp(self._coerce(other) - self.value, self.p)
+
+    def __neg__(self):
+        return Fp(-self.value, self.p)
 
     def __truediv__(self, other):
-        other = Fp(other)
+        other = Fp(self._coerce(other), self.p)
         if other.value == 0:
             raise ZeroDivisionError("有限體除法中除數不能為 0")
         # 使用費馬小定理求逆元素：a^(p-2) % p
-        return self * (other ** (Fp.p - 2))
+        return self * (other ** (self.p - 2))
 
     def __pow__(self, exponent):
         # 使用 Python 內建的三參數 pow(base, exp, mod) 效率最高
-        return Fp(pow(self.value, exponent, Fp.p))
+        return Fp(pow(self.value, exponent, self.p), self.p)
 
     def __eq__(self, other):
-        if not isinstance(other, Fp):
-            other = Fp(other)
-        return self.value == other.value
+        if isinstance(other, Fp) and other.p != self.p:
+            return False
+        return self.value == self._coerce(other)
+
+    def __hash__(self):
+        return hash((self.value, self.p))
 
     def __repr__(self):
         return str(self.value)
 
+# ------------------------------------------
+# 1b. 陣列版有限體元素：一個 NumPy 整數陣列 + 模數
+# ------------------------------------------
+# 兩個 < p 的數相乘必須能放進 int64：p - 1 ≤ 3037000499 (≈ 2^31.5)
+_INT64_MAX_P = 3037000500
+
+class FpArray:
+    """
+    F_p 元素的陣列，所有運算都是逐元素的向量化運算 (類似 NumPy 陣列)
+    p < 2^31.5 時以 int64 儲存；更大的 p 改用 Python 整數 (object 陣列)，仍可正確運算
+    """
+    __slots__ = ("values", "p")
+
+    def __init__(self, values, p):
+        dtype = np.int64 if p < _INT64_MAX_P else object
+        if isinstance(values, FpArray):
+            values = values.values
+        self.p = p
+        array = np.asarray(values)
+        if array.dtype.kind == "f" and not isinstance(values, np.ndarray):
+            # [2**63, -1] 之類混合大小的整數串列會被 NumPy 轉成 float，改以 Python 整數保存
+            exact = np.array(values, dtype=object)
+            if all(isinstance(v, (int, np.integer)) for v in exact.flat):
+                array = exact
+        values = array
+        if values.dtype.kind in "iuO":
+            # 整數先取餘數再轉型：超出 int64 的 Python 整數 (object / uint64 陣列) 不會溢位
+            self.values = (values % p).astype(dtype)
+        else:
+            self.values = values.astype(dtype) % p
+
+    @classmethod
+    def _wrap(cls, values, p):
+        # 已經在 [0, p) 內的陣列直接包裝，不再取餘數
+        out = cls.__new__(cls)
+        out.values, out.p = values, p
+        return out
+
+    def _coerce(self, other):
+        if isinstance(other, (FpArray, Fp)):
+            if other.p != self.p:
+                raise ValueError(f"不同體的元素不能運算: F_{self.p} 與 F_{other.p}")
+            return other.values if isinstance(other, FpArray) else other.value
+        return FpArray(other, self.p).values
+
+    def __add__(self, other):
+        return FpArray._wrap((self.values + self._coerce(other)) % self.p, self.p)
+
+    def __sub__(self, other):
+        return FpArray._wrap((self.values - self._coerce(other)) % self.p, self.p)
+
+    def __mul__(self, other):
+        return FpArray._wrap((self.values * self._coerce(other)) % self.p, self.p)
+
+    __radd__, __rmul__ = __add__, __mul__
+
+    def __rsub__(self, other):
+        return FpArray._wrap((self._coerce(other) - self.values) % self.p, self.p)
+
+    def __neg__(self):
+        return FpArray._wrap((-self.values) % self.p, self.p)
+
+    def __pow__(self, exponent):
+        """
+        逐元素次方：平方乘法 (square-and-multiply)，只需 O(log e) 次向量乘法
+        exponent 可為整數或與陣列同形的整數陣列；負次方先求逆元素
+        """
+        e = np.asarray(exponent)
+        if e.ndim == 0:
+            e = int(e)
+            if e < 0:
+                return self.inverse() ** (-e)
+            base, result = self.values, np.ones_like(self.values)
+            while e:
+                if e & 1:
+                    result = result * base % self.p
+                base = base * base % self.p
+                e >>= 1
+            return FpArray._wrap(result, self.p)
+        if np.any(e < 0):
+            base, e = np.where(e < 0, self.inverse().values, self.values), np.abs(e)
+        else:
+            base = self.values
+        base, e = np.broadcast_arrays(base, e)
+        base, e, result = base.copy(), e.copy(), np.ones_like(base)
+        while np.any(e):
+            result = np.where(e & 1, result * base % self.p, result)
+            base = base * base % self.p
+            e >>= 1
+        return FpArray._wrap(result, self.p)
+
+    def inverse(self):
+        """
+        批次求逆元素 (Montgomery 技巧)：
+            先兩兩相乘建立乘積樹，只對樹根做一次費馬小定理的次方 a^(p-2)，
+            再由上而下推回：inv(左) = inv(父)·右，inv(右) = inv(父)·左
+        共 O(n) 次乘法、log n 次向量運算，不必對每個元素各做一次次方
+        """
+        a = self.values.ravel()
+        if np.any(a == 0):
+            raise ZeroDivisionError("有限體除法中除數不能為 0")
+        if not a.size:
+            return FpArray._wrap(self.values.copy(), self.p)
+        size = 1 << (a.size - 1).bit_length()
+        level = np.ones(size, dtype=a.dtype)
+        level[:a.size] = a
+        levels = [level]
+        while len(level) > 1:
+            level = level[0::2] * level[1::2] % self.p
+            levels.append(level)
+        inv = np.array([pow(int(level[0]), self.p - 2, self.p)], dtype=a.dtype)
+        for level in reversed(levels[:-1]):
+            left, right = level[0::2], level[1::2]
+            down = np.empty_like(level)
+            down[0::2] = inv * right % self.p
+            down[1::2] = inv * left % self.p
+            inv = down
+        return FpArray._wrap(inv[:a.size].reshape(self.values.shape), self.p)
+
+    def __truediv__(self, other):
+        return self * FpArray(self._coerce(other), self.p).inverse()
+
+    def __rtruediv__(self, other):
+        return self.inverse() * other
+
+    def __eq__(self, other):
+        return self.values == self._coerce(other)
+
+    __hash__ = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        item = self.values[index]
+        if np.ndim(item) == 0:
+            return Fp(int(item), self.p)
+        return FpArray._wrap(item, self.p)
+
+    def __iter__(self):
+        return (Fp(int(v), self.p) for v in self.values)
+
+    def __repr__(self):
+        return f"FpArray({self.values.tolist()}, p={self.p})"
+
 # ==========================================
 # 2. 群公理驗證器 (類似 group_axioms.py)
 # ==========================================
-def check_group_axioms(group):
+def _index_form(group):
+    """
+    把群轉成索引形式：元素編號 0..n-1，回傳 (n, mul, e, inv, name)
+      mul(i, j): 向量化的運算，結果不在集合內時為 -1
+      e: 單位元的索引，inv: 每個元素反元素的索引陣列，name(i): 元素的顯示方式
+    群若提供 codes / op_array / inv_array / identity_code (整數編碼的向量化運算)，
+    就完全以 NumPy 計算；否則以 op 逐對建立 Cayley 表 (O(n^2) 次呼叫)，之後的檢查仍為向量化
+    """
+    if hasattr(group, "op_array"):
+        codes = np.sort(np.asarray(group.codes()))
+        n = len(codes)
+
+        def lookup(r):
+            # 以二分搜尋把編碼轉回索引，不在集合內的編碼得到 -1
+            idx = np.searchsorted(codes, r)
+            hit = codes[np.minimum(idx, n - 1)] == r
+            return np.where(hit, idx, -1)
+
+        def mul(i, j):
+            return lookup(group.op_array(codes[i], codes[j]))
+
+        e = int(lookup(np.array([group.identity_code]))[0])
+        inv = lookup(group.inv_array(codes))
+        return n, mul, e, inv, lambda i: codes[i]
+
     elements = group.elements
-    op = group.op
-    identity = group.identity
+    n = len(elements)
+    index = {a: k for k, a in enumerate(elements)}
+    table = np.array([[index.get(group.op(a, b), -1) for b in elements] for a in elements],
+                     dtype=np.int64).reshape(n, n)
+    e = index.get(group.identity, -1)
+    inv = np.array([index.get(group.inv(a), -1) for a in elements], dtype=np.int64)
+    return n, (lambda i, j: table[i, j]), e, inv, lambda i: elements[i]
+
+def _tuples(n, k, limit, samples, rng, block=1 << 20):
+    """
+    產生要檢查的 k 元組 (以索引陣列表示)：
+    n^k ≤ limit 時窮舉全部，否則隨機抽樣 samples 組；每次最多 block 組
+    回傳 (產生器, 是否為窮舉)
+    """
+    total = n ** k
+    if total <= limit:
+        return ((np.unravel_index(np.arange(s, min(s + block, total)), (n,) * k))
+                for s in range(0, total, block)), True
+    return (tuple(rng.integers(0, n, (k, min(block, samples - s))))
+            for s in range(0, samples, block)), False
+
+def check_group_axioms(group, max_pairs=10**8, max_triples=10**7,
+                       confidence=1 - 1e-9, violation_rate=1e-4, seed=0):
+    """
+    驗證群公理，所有檢查皆為向量化運算：
+      單位元、反元素：對 n 個元素逐一檢查 (O(n))
+      封閉性：n^2 ≤ max_pairs 時窮舉所有配對，否則隨機抽樣
+      結合律：n^3 ≤ max_triples 時窮舉所有三元組，否則隨機抽樣
+    抽樣數 m 取到「若至少 violation_rate 比例的組合違反公理，
+    漏檢機率 (1 - violation_rate)^m ≤ 1 - confidence」
+    """
+    n, mul, e, inv, name = _index_form(group)
+    rng = np.random.default_rng(seed)
+    samples = math.ceil(math.log(1 - confidence) / math.log1p(-violation_rate))
     
-    print(f"--- 正在驗證群公理: {group.__class__.__name__} (元素數量: {len(elements)}) ---")
+    print(f"--- 正在驗證群公理: {group.__class__.__name__} (元素數量: {n}) ---")
     
-    # 1. 封閉性 (Closure) - 簡化驗證
-    for a in elements:
-        for b in elements:
-            res = op(a, b)
-            if res not in elements:
-                raise Exception(f"違反封閉性: {a} op {b} = {res}")
-    print("OK: 封閉性通過")
+    def report(exhaustive, count):
+        if exhaustive:
+            return f"窮舉 {count} 組"
+        return (f"抽樣 {count} 組；若違反比例 ≥ {violation_rate:g}，"
+                f"漏檢機率 ≤ {(1 - violation_rate) ** count:.1e}")
+
+    # 1. 封閉性 (Closure)
+    batches, exhaustive = _tuples(n, 2, max_pairs, samples, rng)
+    count = 0
+    for a, b in batches:
+        res = mul(a, b)
+        bad = np.flatnonzero(res < 0)
+        if bad.size:
+            k = bad[0]
+            raise Exception(f"違反封閉性: {name(a[k])} op {name(b[k])} 不在集合中")
+        count += len(a)
+    print(f"OK: 封閉性通過 ({report(exhaustive, count)})")
 
     # 2. 結合律 (Associativity)
-    a, b, c = elements[1], elements[2], elements[3]
-    if op(op(a, b), c) == op(a, op(b, c)):
-        print(f"OK: 結合律通過 ({a}, {b}, {c})")
-    else:
-        raise Exception("違反結合律")
+    batches, exhaustive = _tuples(n, 3, max_triples, samples, rng)
+    count = 0
+    for a, b, c in batches:
+        bad = np.flatnonzero(mul(mul(a, b), c) != mul(a, mul(b, c)))
+        if bad.size:
+            k = bad[0]
+            raise Exception(f"違反結合律: ({name(a[k])}, {name(b[k])}, {name(c[k])})")
+        count += len(a)
+    print(f"OK: 結合律通過 ({report(exhaustive, count)})")
 
     # 3. 單位元 (Identity)
-    for a in elements:
-        if not (op(a, identity) == a and op(identity, a) == a):
-            raise Exception(f"違反單位元性質: {a}")
-    print(f"OK: 單位元驗證通過 (Identity = {identity})")
+    if e < 0:
+        raise Exception(f"違反單位元性質: 單位元 {group.identity} 不在集合中")
+    every = np.arange(n)
+    bad = np.flatnonzero((mul(every, np.full(n, e)) != every) | (mul(np.full(n, e), every) != every))
+    if bad.size:
+        raise Exception(f"違反單位元性質: {name(bad[0])}")
+    print(f"OK: 單位元驗證通過 (Identity = {group.identity})")
 
     # 4. 反元素 (Inverse)
-    for a in elements:
-        inv_a = group.inv(a)
-        if not (op(a, inv_a) == identity):
-            raise Exception(f"違反反元素性質: {a}")
+    bad = np.flatnonzero((inv < 0) | (mul(every, np.maximum(inv, 0)) != e)
+                         | (mul(np.maximum(inv, 0), every) != e))
+    if bad.size:
+        raise Exception(f"違反反元素性質: {name(bad[0])}")
     print("OK: 反元素驗證通過")
     print("結果: 該結構符合群公理!\n")
 
 # ==========================================
 # 3. 有限體的群結構包裝 (參考 field_rational.py)
 # ==========================================
+def prime_factors(n):
+    """試除法分解 n，回傳相異質因數的串列"""
+    factors, d = [], 2
+    while d * d <= n:
+        if n % d == 0:
+            factors.append(d)
+            while n % d == 0:
+                n //= d
+        d += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+def primitive_root(p):
+    """
+    F_p 乘法群的生成元 g：對 p - 1 的每個質因數 q 都有 g^((p-1)/q) ≠ 1
+    """
+    if p == 2:
+        return 1
+    factors = prime_factors(p - 1)
+    for g in range(2, p):
+        if all(pow(g, (p - 1) // q, p) != 1 for q in factors):
+            return g
+    raise ValueError(f"{p} 不是質數，沒有原根")
+
 class FpAddGroup:
     def __init__(self, p):
-        Fp.p = p
-        self.elements = [Fp(i) for i in range(p)]
-        self.identity = Fp(0)
+        self.p = p
+        self.elements = [Fp(i, p) for i in range(p)]
+        self.identity = Fp(0, p)
     
     def op(self, a, b): return a + b
-    def inv(self, a): return Fp(-a.value)
+    def inv(self, a): return -a
+
+    # 向量化介面：元素以整數 0..p-1 編碼
+    identity_code = 0
+    def codes(self): return np.arange(self.p)
+    def op_array(self, x, y): return (x + y) % self.p
+    def inv_array(self, x): return (-x) % self.p
 
 class FpMulGroup:
     def __init__(self, p):
-        Fp.p = p
+        self.p = p
         # 乘法群排除 0
-        self.elements = [Fp(i) for i in range(1, p)]
-        self.identity = Fp(1)
+        self.elements = [Fp(i, p) for i in range(1, p)]
+        self.identity = Fp(1, p)
+        self._log = None
     
     def op(self, a, b): return a * b
-    def inv(self, a): return a ** (Fp.p - 2)
+    def inv(self, a): return a ** (self.p - 2)
+
+    # 向量化介面：元素以整數 1..p-1 編碼，乘法透過離散對數表變成指數相加
+    #   a·b = g^(log a + log b mod (p-1))，a^(-1) = g^(-log a mod (p-1))
+    identity_code = 1
+    def codes(self): return np.arange(1, self.p)
+
+    def _tables(self):
+        if self._log is None:
+            self.generator = primitive_root(self.p)
+            k = np.arange(self.p - 1)
+            self._antilog = (FpArray(self.generator, self.p) ** k).values
+            self._log = np.full(self.p, -1, dtype=np.int64)
+            self._log[self._antilog] = k
+            if np.count_nonzero(self._log >= 0) != self.p - 1:
+                raise ValueError(f"{self.generator} 不是 F_{self.p} 的生成元")
+        return self._log, self._antilog
+
+    def op_array(self, x, y):
+        log, antilog = self._tables()
+        return antilog[(log[x] + log[y]) % (self.p - 1)]
+
+    def inv_array(self, x):
+        log, antilog = self._tables()
+        return antilog[(-log[x]) % (self.p - 1)]
 
 # ==========================================
 # 4. 分配律驗證 (參考 field_axioms.py)
@@ -111,6 +408,268 @@ def check_distributivity(a, b, c):
     assert left == right
     print("OK: 分配律通過\n")
 
+# ==========================================
+# 5. 數論轉換 (NTT) 多項式乘法
+# ==========================================
+def is_prime(n):
+    """Miller–Rabin；底數 2, 3, 5, 7 對 n < 3.2·10^9 為確定性判斷"""
+    if n < 2:
+        return False
+    for q in (2, 3, 5, 7):
+        if n % q == 0:
+            return n == q
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in (2, 3, 5, 7):
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+# NTT 質數上限：兩個 < 2^30 的數相乘仍在 int64 範圍內；蝴蝶運算的延遲取餘值 < 4p < 2^32
+_NTT_PRIME_LIMIT = 1 << 30
+_ntt_primes = {}
+_ntt_plans = {}
+# 四步驟 NTT 每次處理的元素數 (欄數 × 欄長)：約 2^16 個 uint64，工作陣列可留在 L2 快取內
+_NTT_BLOCK = 1 << 16
+
+def ntt_primes(size, count):
+    """
+    找出 count 個 < 2^30、形如 c·2^k + 1 (2^k ≥ size) 的質數，由大到小
+    這類質數的乘法群含有 size 次單位根，可做長度 size 的 NTT
+    """
+    key = (size, count)
+    if key not in _ntt_primes:
+        primes = []
+        p = (_NTT_PRIME_LIMIT - 2) // size * size + 1
+        while len(primes) < count and p > size:
+            if is_prime(p):
+                primes.append(p)
+            p -= size
+        if len(primes) < count:
+            raise ValueError(f"找不到 {count} 個支援長度 {size} 的 NTT 質數")
+        _ntt_primes[key] = primes
+    return _ntt_primes[key]
+
+def _powers(w, count, p):
+    """w^0, w^1, ..., w^(count-1) mod p：每次把已算好的前半段乘上 w^k 延伸一倍"""
+    out = np.ones(count, dtype=np.int64)
+    k = 1
+    while k < count:
+        step = min(k, count - k)
+        out[k:k + step] = out[:step] * pow(w, k, p) % p
+        k *= 2
+    return out
+
+def _shoup(w, p):
+    """Shoup 乘法的預算值 w' = floor(w·2^32 / p)，與 w 一起存成 uint32"""
+    w = np.asarray(w, dtype=np.uint64)
+    return w.astype(np.uint32), ((w << np.uint64(32)) // np.uint64(p)).astype(np.uint32)
+
+def _mulmod(x, w, p, out, tmp):
+    """
+    Shoup 模乘：x·w mod p 的結果落在 [0, 2p)，只用乘法與位移，不做除法
+        q = (x·w') >> 32，x·w - q·p ∈ [0, 2p)   (需 x < 2^32)
+    w 為 _shoup 回傳的 (w, w')；out、tmp 為同形的 uint64 工作陣列
+    """
+    w, ws = w
+    np.multiply(x, ws, out=tmp)
+    tmp >>= np.uint64(32)
+    tmp *= p
+    np.multiply(x, w, out=out)
+    out -= tmp
+    return out
+
+def _reduce2(x, p2, tmp):
+    """[0, 2·p2) → [0, p2)：無號數相減，小於 p2 的會下溢成極大值，取兩者較小者即可"""
+    np.subtract(x, p2, out=tmp)
+    np.minimum(x, tmp, out=x)
+
+def _ntt_stages(table, N, L, p):
+    """長度 L 的轉換 (L | N) 各層 radix-4 蝴蝶的旋轉因子 w^r, w^(2r), w^(3r)，w 為 4R 次單位根"""
+    step = N // L
+    R = 1 if L.bit_length() % 2 else 2  # L 為 2 的奇數次方時先做一層 radix-2
+    stages = []
+    while R < L:
+        h = L // (4 * R)
+        twiddles = tuple(tw.reshape(R, 1, 1) for t in (1, 2, 3)
+                         for tw in _shoup(table[:t * h * R * step:t * h * step], p))
+        stages.append((R, h, twiddles[0:2], twiddles[2:4], twiddles[4:6]))
+        R *= 4
+    return stages
+
+def _ntt_plan(p, N):
+    """
+    長度 N 的轉換計畫 (依 (p, N) 快取)，N = N1·N2 (N1 ≤ N2，皆為 2 的次方)：
+      兩段欄轉換各層的旋轉因子、中間的旋轉因子矩陣 w^(k1·n2) (N1 × N2)、
+      4 次單位根 J = w^(N/4) 與 N^(-1)
+    w = g^((p-1)/N) 為 N 次本原單位根，g 由 primitive_root 自動求得
+    """
+    key = (p, N)
+    if key not in _ntt_plans:
+        if (p - 1) % N:
+            raise ValueError(f"F_{p} 沒有 {N} 次單位根")
+        table = _powers(pow(primitive_root(p), (p - 1) // N, p), N, p)
+        k = N.bit_length() - 1
+        N1, N2 = 1 << (k // 2), 1 << (k - k // 2)
+        index = np.arange(N1)[:, None] * np.arange(N2) % N
+        _ntt_plans[key] = (N1, N2, _ntt_stages(table, N, N1, p), _ntt_stages(table, N, N2, p),
+                           _shoup(table[index], p), _shoup(table[N // 4] if N >= 4 else 1, p),
+                           _shoup(pow(N, p - 2, p), p))
+    return _ntt_plans[key]
+
+def _ntt_columns(X, stages, J, p):
+    """
+    對 X (L × B，uint64，值 < 2p) 的每一欄做長度 L 的 NTT，輸出為自然順序、值 < 4p
+    L 看成 R × (L/R)：第 r 列是間隔 L/R 的子序列的轉換結果；每層把間隔 4h 的四段
+    (A0, A1, A2, A3) 合併成間隔 h 的轉換 (R → 4R)，w 為 4R 次單位根：
+        B_t = w^(t·r)·A_t，y0 = (B0 + B2) + (B1 + B3)，y2 = (B0 + B2) - (B1 + B3)
+                           y1 = (B0 - B2) + J·(B1 - B3)，y3 = (B0 - B2) - J·(B1 - B3)
+    只有 B1..B3 與 J·(B1 - B3) 需要模乘；其餘加減以延遲取餘保持在 [0, 4p)
+    """
+    L, B = X.shape
+    P, P2 = np.uint64(p), np.uint64(2 * p)
+    if L.bit_length() % 2 == 0:
+        h = L // 2
+        Y = np.empty((L, B), dtype=np.uint64)
+        np.add(X[:h], X[h:], out=Y[:h])
+        np.subtract(X[:h], X[h:], out=Y[h:])
+        Y[h:] += P2
+        X = Y
+    if not stages:
+        return np.array(X)
+    b0, b1, b2, b3, d, s = (np.empty(L * B // 4, dtype=np.uint64) for _ in range(6))
+    buffers = [np.empty(L * B, dtype=np.uint64) for _ in range(2)]
+    for i, (R, h, w1, w2, w3) in enumerate(stages):
+        X3 = X.reshape(R, 4 * h, B)
+        A0, A1, A2, A3 = (X3[:, t * h:(t + 1) * h] for t in range(4))
+        B0, B1, B2, B3, D, S = (v.reshape(R, h, B) for v in (b0, b1, b2, b3, d, s))
+        np.subtract(A0, P2, out=B0)
+        np.minimum(A0, B0, out=B0)
+        _mulmod(A1, w1, P, B1, S)
+        _mulmod(A2, w2, P, B2, S)
+        _mulmod(A3, w3, P, B3, S)
+        np.subtract(B0, B2, out=D)
+        D += P2
+        _reduce2(D, P2, S)
+        B0 += B2
+        _reduce2(B0, P2, S)
+        np.subtract(B1, B3, out=B2)
+        B2 += P2
+        B1 += B3
+        _reduce2(B1, P2, S)
+        _mulmod(B2, J, P, B3, S)
+        Y = buffers[i % 2]
+        Y3 = Y.reshape(4 * R, h, B)
+        np.add(B0, B1, out=Y3[:R])
+        np.subtract(B0, B1, out=Y3[2 * R:3 * R])
+        Y3[2 * R:3 * R] += P2
+        np.add(D, B3, out=Y3[R:2 * R])
+        np.subtract(D, B3, out=Y3[3 * R:])
+        Y3[3 * R:] += P2
+        X = Y.reshape(L, B)
+    return X
+
+def ntt(a, p, inverse=False):
+    """
+    長度為 2 的次方的 NTT (F_p 上的離散傅立葉轉換)，輸出為自然順序，不需位元反轉
+    四步驟演算法：把序列排成 N1 × N2 陣列 A[n1, n2] = a[n1·N2 + n2]，
+      1. 對每一欄做長度 N1 的轉換，2. 乘上旋轉因子 w^(k1·n2)，
+      3. 轉置後對每一欄做長度 N2 的轉換，結果 X[k2, k1] 即為第 k1 + N1·k2 項
+    每次只處理 _NTT_BLOCK 個元素的欄區塊，工作陣列留在快取內；各層為 radix-4 蝴蝶
+    inverse=True 時利用 INTT(a)[n] = N^(-1)·NTT(a')[n]，a'[k] = a[-k mod N]，與正轉換共用計畫
+    """
+    a = np.asarray(a, dtype=np.int64)
+    N = len(a)
+    N1, N2, stages1, stages2, twiddle, J, n_inv = _ntt_plan(p, N)
+    P = np.uint64(p)
+    if inverse:
+        a = np.concatenate([a[:1], a[:0:-1]])
+    A = (a % p).astype(np.uint64).reshape(N1, N2)
+    Z = np.empty((N2, N1), dtype=np.uint64)
+    b = max(1, _NTT_BLOCK // N1)
+    for j in range(0, N2, b):
+        Y = _ntt_columns(A[:, j:j + b], stages1, J, p)
+        M, S = np.empty_like(Y), np.empty_like(Y)
+        Z[j:j + b] = _mulmod(Y, (twiddle[0][:, j:j + b], twiddle[1][:, j:j + b]), P, M, S).T
+    out = np.empty((N2, N1), dtype=np.uint64)
+    b = max(1, _NTT_BLOCK // N2)
+    for k in range(0, N1, b):
+        Y = _ntt_columns(Z[:, k:k + b], stages2, J, p)
+        if inverse:
+            Y = _mulmod(Y, n_inv, P, np.empty_like(Y), np.empty_like(Y))
+        np.remainder(Y, P, out=out[:, k:k + b])
+    return out.ravel().astype(np.int64)
+
+def _garner(residues, primes, q):
+    """
+    Garner 演算法：由各質數下的餘數還原整數，直接在 mod q 下組合
+        x = t0 + t1·m0 + t2·m0·m1 + ...，t_i 依序在 mod m_i 下求出
+    所有中間量都 < 2^30，乘積不會超出 int64
+    """
+    digits = []
+    for i, (r, m) in enumerate(zip(residues, primes)):
+        # 前面各位數在 mod m 下的累加值與 (m0·...·m_{i-1})^(-1) mod m
+        acc, scale = np.zeros_like(r), 1
+        for t, m_prev in zip(digits, primes):
+            acc = (acc + t * scale) % m
+            scale = scale * m_prev % m
+        digits.append((r - acc) % m * pow(scale, m - 2, m) % m)
+    x, scale = np.zeros_like(residues[0]), 1
+    for t, m in zip(digits, primes):
+        x = (x + t % q * scale) % q
+        scale = scale * m % q
+    return x
+
+def poly_mul(a, b):
+    """
+    F_p 上的多項式乘法 (a, b 為係數由低到高的 FpArray，且 p 相同)，回傳 FpArray
+    p 本身支援所需長度的 NTT 時直接轉換；否則把係數視為 [0, p) 的整數做卷積，
+    選足夠多個 NTT 質數使其乘積 > 卷積係數上限 n·(p-1)^2，再以 CRT 合併並取 mod p
+    """
+    if a.p != b.p:
+        raise ValueError(f"不同體的多項式不能相乘: F_{a.p} 與 F_{b.p}")
+    p = a.p
+    if p >= _INT64_MAX_P:
+        raise ValueError(f"p = {p} 太大，NTT 乘法需要 p < {_INT64_MAX_P}")
+    length = len(a) + len(b) - 1
+    if length <= 0:
+        return FpArray([], p)
+    N = 1 << (length - 1).bit_length()
+    if p < _NTT_PRIME_LIMIT and (p - 1) % N == 0:
+        primes = [p]
+    else:
+        bound = min(len(a), len(b)) * (p - 1) ** 2
+        primes, product = [], 1
+        for m in ntt_primes(N, 8):
+            primes.append(m)
+            product *= m
+            if product > bound:
+                break
+    residues = []
+    for m in primes:
+        fa = ntt(np.pad(a.values % m, (0, N - len(a))), m)
+        fb = ntt(np.pad(b.values % m, (0, N - len(b))), m)
+        residues.append(ntt(fa * fb % m, m, inverse=True)[:length])
+    if primes == [p]:
+        return FpArray._wrap(residues[0], p)
+    return FpArray._wrap(_garner(residues, primes, p), p)
+
+def poly_mul_naive(a, b):
+    """直式乘法：逐項相乘累加 Fp 物件，O(n^2)"""
+    result = [Fp(0, a[0].p) for _ in range(len(a) + len(b) - 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            result[i + j] = result[i + j] + x * y
+    return result
+
 # ==========================================
 # 主程式執行
 # ==========================================
@@ -125,15 +684,93 @@ if __name__ == "__main__":
     mul_group = FpMulGroup(P_VALUE)
     check_group_axioms(mul_group)
     
+    # 大群：p = 100003，封閉性與結合律改為抽樣
+    P_LARGE = 100_003
+    for group in [FpAddGroup, FpMulGroup]:
+        start = time.perf_counter()
+        check_group_axioms(group(P_LARGE))
+        print(f"耗時 {time.perf_counter() - start:.2f} s\n")
+
     # 驗證分配律
-    a, b, c = Fp(3), Fp(7), Fp(10)
+    a, b, c = Fp(3, P_VALUE), Fp(7, P_VALUE), Fp(10, P_VALUE)
     check_distributivity(a, b, c)
     
     # 示範四則運算
-    x = Fp(5)
-    y = Fp(8)
+    x = Fp(5, P_VALUE)
+    y = Fp(8, P_VALUE)
     print(f"示範運算 (p={P_VALUE}):")
     print(f"{x} + {y} = {x + y}")
     print(f"{x} - {y} = {x - y}")
     print(f"{x} * {y} = {x * y}")
-    print(f"{x} / {y} = {x / y}  (因為 {x/y} * {y} = {(x/y)*y})")
\ No newline at end of file
+    print(f"{x} / {y} = {x / y}  (因為 {x/y} * {y} = {(x/y)*y})")
+
+    # 不同體的元素各自帶模數，混用會直接報錯
+    try:
+        Fp(3, 13) + Fp(3, 17)
+    except ValueError as e:
+        print(f"\n混用體的檢查: {e}")
+
+    # 陣列版：一次處理整個陣列
+    xs = FpArray([5, 6, 7, 12], P_VALUE)
+    ys = FpArray([8, 3, 1, 12], P_VALUE)
+    print(f"\n陣列運算 (p={P_VALUE}):")
+    print(f"{xs} + {ys} = {xs + ys}")
+    print(f"{xs} * {ys} = {xs * ys}")
+    print(f"{xs} / {ys} = {xs / ys}")
+    print(f"{xs} ** 5 = {xs ** 5}")
+    assert all(xs[i] / ys[i] == (xs / ys)[i] for i in range(len(xs)))
+
+    # 效能比較：10^6 個元素的乘法與求逆，逐個 Fp 物件 vs FpArray
+    P_BIG = 1_000_000_007
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    u = rng.integers(1, P_BIG, n)
+    v = rng.integers(1, P_BIG, n)
+
+    start = time.perf_counter()
+    fu = [Fp(int(k), P_BIG) for k in u]
+    fv = [Fp(int(k), P_BIG) for k in v]
+    prod = [s * t for s, t in zip(fu, fv)]
+    invs = [s ** (P_BIG - 2) for s in fu]
+    t_obj = time.perf_counter() - start
+
+    start = time.perf_counter()
+    au, av = FpArray(u, P_BIG), FpArray(v, P_BIG)
+    prod_arr = au * av
+    inv_arr = au.inverse()
+    t_arr = time.perf_counter() - start
+
+    assert [t.value for t in prod] == prod_arr.values.tolist()
+    assert [t.value for t in invs] == inv_arr.values.tolist()
+    print(f"\n{n} 個元素的乘法 + 求逆 (p={P_BIG}):")
+    print(f"  逐個 Fp 物件: {t_obj:.3f} s")
+    print(f"  FpArray     : {t_arr:.3f} s  ({t_obj / t_arr:.0f} 倍)")
+
+    # NTT 多項式乘法：與直式乘法比較，並以隨機點求值驗證大次數的結果
+    def evaluate(f, x):
+        # Schwartz–Zippel：f(x) = g(x)·h(x) 在隨機 x 成立，則 f ≠ g·h 的機率 ≤ 次數 / p
+        return int((f * FpArray(x, f.p) ** np.arange(len(f))).values.sum() % f.p)
+
+    print("\nNTT 多項式乘法 (次數 n 的兩個多項式相乘):")
+    for p in [998_244_353, P_BIG]:
+        kind = "NTT 質數，單一模數" if (p - 1) % (1 << 21) == 0 else "一般質數，多模數 CRT"
+        print(f"  p = {p} ({kind})")
+        f = FpArray(rng.integers(0, p, 1001), p)
+        g = FpArray(rng.integers(0, p, 1001), p)
+        start = time.perf_counter()
+        naive = poly_mul_naive(list(f), list(g))
+        t_naive = time.perf_counter() - start
+        start = time.perf_counter()
+        fast = poly_mul(f, g)
+        t_fast = time.perf_counter() - start
+        assert fast.values.tolist() == [c.value for c in naive]
+        print(f"    n = 1000     直式乘法 {t_naive:7.3f} s   NTT {t_fast:7.3f} s")
+        for n in [10**4, 10**5, 10**6]:
+            f = FpArray(rng.integers(0, p, n + 1), p)
+            g = FpArray(rng.integers(0, p, n + 1), p)
+            start = time.perf_counter()
+            h = poly_mul(f, g)
+            t_fast = time.perf_counter() - start
+            x = int(rng.integers(1, p))
+            assert evaluate(h, x) == evaluate(f, x) * evaluate(g, x) % p
+            print(f"    n = {n:<8} 直式乘法 {'(略過)':>9}   NTT {t_fast:7.3f} s")
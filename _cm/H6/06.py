@@ -1,8 +1,13 @@
+import heapq
 import math
+import time
+import numpy as np
 
 # --- 1. 基礎幾何物件定義 ---
 
 class Point:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x, self.y = x, y
     def __repr__(self):
@@ -20,25 +25,123 @@ class Circle:
         self.center = center
         self.r = r
 
+class Affine:
+    """
+    平面仿射變換，以 3×3 齊次座標矩陣表示：[x', y', 1]^T = M·[x, y, 1]^T
+    translate / rotate / scale 回傳「先做原本的變換、再做這一步」的新物件，
+    只是 3×3 矩陣相乘，與要變換的點數無關
+    """
+    __slots__ = ("matrix",)
+
+    def __init__(self, matrix=None):
+        self.matrix = np.eye(3) if matrix is None else np.asarray(matrix, dtype=float)
+
+    def then(self, other):
+        """先做 self 再做 other"""
+        return Affine(other.matrix @ self.matrix)
+
+    def translate(self, dx, dy):
+        return self.then(Affine([[1, 0, dx], [0, 1, dy], [0, 0, 1]]))
+
+    def rotate(self, angle_deg, center=None):
+        """繞 center (預設為原點) 逆時針旋轉 angle_deg 度"""
+        rad = math.radians(angle_deg)
+        cos_a, sin_a = math.cos(rad), math.sin(rad)
+        return self._about(Affine([[cos_a, -sin_a, 0], [sin_a, cos_a, 0], [0, 0, 1]]), center)
+
+    def scale(self, sx, sy=None, center=None):
+        """以 center (預設為原點) 為中心縮放，sy 省略時等比例縮放"""
+        sy = sx if sy is None else sy
+        return self._about(Affine([[sx, 0, 0], [0, sy, 0], [0, 0, 1]]), center)
+
+    def _about(self, step, center):
+        # 繞任意中心的變換 = 平移到原點 → 變換 → 平移回去
+        if center is None:
+            return self.then(step)
+        return self.translate(-center.x, -center.y).then(step).translate(center.x, center.y)
+
+    def is_identity(self):
+        return np.array_equal(self.matrix, np.eye(3))
+
+    def apply(self, xy):
+        """對 (N, 2) 座標陣列套用變換：一次矩陣乘法 xy·R^T + t"""
+        xy = np.asarray(xy, dtype=float)
+        return xy @ self.matrix[:2, :2].T + self.matrix[:2, 2]
+
+    def __repr__(self):
+        return f"Affine({self.matrix[:2].round(6).tolist()})"
+
 class Triangle:
+    """
+    平移/旋轉/縮放不會立即修改頂點，而是累積成一個待套用的 Affine；
+    讀取 points 時才一次套用到三個 Point 上
+    """
     def __init__(self, p1, p2, p3):
-        self.points = [p1, p2, p3]
+        self._points = [p1, p2, p3]
+        self._pending = Affine()
+
+    @property
+    def points(self):
+        if not self._pending.is_identity():
+            xy = self._pending.apply([(p.x, p.y) for p in self._points])
+            for p, (x, y) in zip(self._points, xy.tolist()):
+                p.x, p.y = x, y
+            self._pending = Affine()
+        return self._points
     
     def __repr__(self):
         return f"Triangle{self.points}"
 
     def translate(self, dx, dy):
-        for p in self.points:
-            p.x += dx
-            p.y += dy
+        self._pending = self._pending.translate(dx, dy)
 
-    def rotate(self, angle_deg, center=Point(0,0)):
-        rad = math.radians(angle_deg)
-        cos_a, sin_a = math.cos(rad), math.sin(rad)
-        for p in self.points:
-            tx, ty = p.x - center.x, p.y - center.y
-            p.x = tx * cos_a - ty * sin_a + center.x
-            p.y = tx * sin_a + ty * cos_a + center.y
+    def rotate(self, angle_deg, center=None):
+        # center 預設為原點；不使用 Point(0, 0) 作為預設值，避免共用同一個可變物件
+        self._pending = self._pending.rotate(angle_deg, center)
+
+    def scale(self, sx, sy=None, center=None):
+        self._pending = self._pending.scale(sx, sy, center)
+
+class Mesh:
+    """
+    大量三角形的網格：頂點存成 (N, 2) 陣列，triangles 為 (T, 3) 的頂點索引
+    變換同樣延遲累積，讀取 vertices 時才以一次矩陣乘法套用到全部頂點
+    """
+    def __init__(self, vertices, triangles=None):
+        self._vertices = np.asarray(vertices, dtype=float)
+        self.triangles = None if triangles is None else np.asarray(triangles)
+        self._pending = Affine()
+
+    def __len__(self):
+        return len(self._vertices) // 3 if self.triangles is None else len(self.triangles)
+
+    @property
+    def vertices(self):
+        if not self._pending.is_identity():
+            self._vertices = self._pending.apply(self._vertices)
+            self._pending = Affine()
+        return self._vertices
+
+    def corners(self):
+        """每個三角形的三個頂點座標，形狀 (T, 3, 2)"""
+        v = self.vertices
+        return v.reshape(-1, 3, 2) if self.triangles is None else v[self.triangles]
+
+    def transform(self, affine):
+        self._pending = self._pending.then(affine)
+        return self
+
+    def translate(self, dx, dy):
+        self._pending = self._pending.translate(dx, dy)
+        return self
+
+    def rotate(self, angle_deg, center=None):
+        self._pending = self._pending.rotate(angle_deg, center)
+        return self
+
+    def scale(self, sx, sy=None, center=None):
+        self._pending = self._pending.scale(sx, sy, center)
+        return self
 
 # --- 2. 運算核心 ---
 
@@ -67,6 +170,368 @@ def intersect_line_circle(line, circle):
     vx, vy = vx/mag, vy/mag
     return [Point(foot.x + vx*h, foot.y + vy*h), Point(foot.x - vx*h, foot.y - vy*h)]
 
+# --- 2b. 批次運算核心 (structure of arrays) ---
+# 每個物件的座標/係數各自存成一個陣列，一次 NumPy 運算處理全部資料
+# pairwise=False 時逐一配對 (第 i 條對第 i 條，可廣播)；pairwise=True 時計算 N × M 全部組合
+# 結果以陣列回傳，搭配 valid 遮罩標示哪些結果存在 (無效位置填 nan)
+
+def line_coefficients(x1, y1, x2, y2):
+    """由兩點座標陣列求 Ax + By + C = 0 的係數陣列 (與 Line 相同的定義)"""
+    x1, y1, x2, y2 = (np.asarray(v, dtype=float) for v in (x1, y1, x2, y2))
+    return y1 - y2, x2 - x1, x1 * y2 - x2 * y1
+
+def _pairs(first, second, pairwise):
+    """pairwise 時把第一組加上新的最後一軸、第二組加上新的倒數第二軸，廣播成 N × M"""
+    first = [np.asarray(v, dtype=float) for v in first]
+    second = [np.asarray(v, dtype=float) for v in second]
+    if pairwise:
+        first = [v[..., :, None] for v in first]
+        second = [v[..., None, :] for v in second]
+    return first, second
+
+def intersect_lines_batch(A1, B1, C1, A2, B2, C2, pairwise=False, eps=1e-9):
+    """
+    批次求兩組直線的交點，回傳 (x, y, valid)
+    平行 (|det| < eps) 的組合 valid = False，座標為 nan
+    """
+    (A1, B1, C1), (A2, B2, C2) = _pairs((A1, B1, C1), (A2, B2, C2), pairwise)
+    det = A1 * B2 - A2 * B1
+    valid = np.abs(det) >= eps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.where(valid, (B1 * C2 - B2 * C1) / det, np.nan)
+        y = np.where(valid, (A2 * C1 - A1 * C2) / det, np.nan)
+    return x, y, valid
+
+def foot_of_perpendicular_batch(px, py, A, B, C, pairwise=False):
+    """
+    批次求點到直線的垂足，回傳 (x, y, valid)
+    pairwise=True 時為每個點對每條直線；退化直線 (A = B = 0) 的 valid = False
+    """
+    (px, py), (A, B, C) = _pairs((px, py), (A, B, C), pairwise)
+    n2 = A * A + B * B
+    valid = n2 > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(valid, -(A * px + B * py + C) / n2, np.nan)
+    return px + A * t, py + B * t, valid
+
+def intersect_line_circle_batch(A, B, C, cx, cy, r, pairwise=False):
+    """
+    批次求直線與圓的交點，回傳 (x, y, valid)，x、y、valid 的最後一軸長度為 2
+    與 intersect_line_circle 相同：相離 (d^2 > r^2) 時沒有交點，相切 (d^2 ≤ r^2 且相對差 ≤ 1e-9) 時
+    只有第一個交點有效，其餘為兩個交點 foot ± h·(B, -A)/|(A, B)|
+    """
+    (A, B, C), (cx, cy, r) = _pairs((A, B, C), (cx, cy, r), pairwise)
+    fx, fy, ok = foot_of_perpendicular_batch(cx, cy, A, B, C)
+    d2 = (fx - cx) ** 2 + (fy - cy) ** 2
+    r2 = r * r
+    tangent = ok & (d2 <= r2) & np.isclose(d2, r2, rtol=1e-9, atol=0)
+    secant = ok & (d2 < r2) & ~tangent
+    with np.errstate(invalid="ignore", divide="ignore"):
+        h = np.where(secant, np.sqrt(r2 - d2), 0.0) / np.hypot(A, B)
+    valid = np.stack([secant | tangent, secant], axis=-1)
+    x = np.stack([fx + B * h, fx - B * h], axis=-1)
+    y = np.stack([fy - A * h, fy + A * h], axis=-1)
+    return np.where(valid, x, np.nan), np.where(valid, y, np.nan), valid
+
+# --- 2c. 空間索引與掃描線 ---
+# 線段以端點座標陣列 (x1, y1, x2, y2) 表示，圓以 (cx, cy, r) 表示
+# 先以外接矩形 (bounding box) 建立均勻格網索引，只對格網中真正靠近的組合做精確計算
+
+def segment_boxes(x1, y1, x2, y2):
+    """線段的外接矩形 (xmin, ymin, xmax, ymax)"""
+    x1, y1, x2, y2 = (np.asarray(v, dtype=float) for v in (x1, y1, x2, y2))
+    return np.minimum(x1, x2), np.minimum(y1, y2), np.maximum(x1, x2), np.maximum(y1, y2)
+
+def circle_boxes(cx, cy, r):
+    """圓的外接正方形 (xmin, ymin, xmax, ymax)"""
+    cx, cy, r = (np.asarray(v, dtype=float) for v in (cx, cy, r))
+    return cx - r, cy - r, cx + r, cy + r
+
+def point_segment_distance_batch(px, py, x1, y1, x2, y2):
+    """點到線段的距離 (可廣播)：垂足落在線段外時取較近的端點"""
+    dx, dy = x2 - x1, y2 - y1
+    n2 = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(n2 > 0, ((px - x1) * dx + (py - y1) * dy) / n2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+def intersect_segments_batch(x1, y1, x2, y2, x3, y3, x4, y4, eps=1e-12):
+    """
+    逐一配對求線段 (x1,y1)-(x2,y2) 與 (x3,y3)-(x4,y4) 的交點，回傳 (x, y, valid)
+    以參數式 P = P1 + t·(P2 - P1) = P3 + u·(P4 - P3) 求解，0 ≤ t, u ≤ 1 才有效
+    平行 (含共線重疊) 的組合視為沒有單一交點
+    """
+    dx1, dy1, dx2, dy2 = x2 - x1, y2 - y1, x4 - x3, y4 - y3
+    det = dx1 * dy2 - dy1 * dx2
+    ex, ey = x3 - x1, y3 - y1
+    scale = np.hypot(dx1, dy1) * np.hypot(dx2, dy2)
+    ok = np.abs(det) > eps * scale
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (ex * dy2 - ey * dx2) / det
+        u = (ex * dy1 - ey * dx1) / det
+        tol = 1e-12
+        valid = ok & (t >= -tol) & (t <= 1 + tol) & (u >= -tol) & (u <= 1 + tol)
+        return (np.where(valid, x1 + t * dx1, np.nan), np.where(valid, y1 + t * dy1, np.nan), valid)
+
+def intersect_segment_circle_batch(x1, y1, x2, y2, cx, cy, r):
+    """
+    逐一配對求線段與圓周的交點，回傳 (x, y, valid)，最後一軸長度為 2
+    先求直線與圓的交點，再保留落在線段上的 (參數 0 ≤ t ≤ 1)
+    """
+    x1, y1, x2, y2, cx, cy, r = (np.asarray(v, dtype=float) for v in (x1, y1, x2, y2, cx, cy, r))
+    A, B, C = line_coefficients(x1, y1, x2, y2)
+    x, y, valid = intersect_line_circle_batch(A, B, C, cx, cy, r)
+    dx, dy = (x2 - x1)[..., None], (y2 - y1)[..., None]
+    with np.errstate(invalid="ignore"):
+        t = ((x - x1[..., None]) * dx + (y - y1[..., None]) * dy) / (dx * dx + dy * dy)
+        valid = valid & (t >= -1e-12) & (t <= 1 + 1e-12)
+    return np.where(valid, x, np.nan), np.where(valid, y, np.nan), valid
+
+class GridIndex:
+    """
+    均勻格網空間索引：每個外接矩形登記到它覆蓋的所有格子
+    格子內容以 CSR 形式儲存 (items 依格子編號排序，starts[c]:starts[c+1] 為第 c 格)
+    cell 預設取「矩形的中位尺寸」與「平均每格一個物件的邊長」中較大者
+    """
+    def __init__(self, xmin, ymin, xmax, ymax, cell=None):
+        self.boxes = tuple(np.asarray(v, dtype=float) for v in (xmin, ymin, xmax, ymax))
+        xmin, ymin, xmax, ymax = self.boxes
+        n = len(xmin)
+        self.x0, self.y0 = (float(xmin.min()), float(ymin.min())) if n else (0.0, 0.0)
+        width = float(xmax.max()) - self.x0 if n else 1.0
+        height = float(ymax.max()) - self.y0 if n else 1.0
+        if cell is None:
+            size = np.median(np.maximum(xmax - xmin, ymax - ymin)) if n else 1.0
+            cell = max(size, math.sqrt(width * height / max(n, 1)), 1e-12)
+        self.cell = cell
+        self.nx = int(width // cell) + 1
+        self.ny = int(height // cell) + 1
+        cells, items = self._cover(xmin, ymin, xmax, ymax)
+        order = np.argsort(cells, kind="stable")
+        self.items = items[order]
+        self.starts = np.searchsorted(cells[order], np.arange(self.nx * self.ny + 1))
+
+    def __len__(self):
+        return len(self.boxes[0])
+
+    def _cover(self, xmin, ymin, xmax, ymax):
+        """把每個矩形展開成它覆蓋的 (格子編號, 矩形編號)，超出格網的部分截掉"""
+        ix0 = np.clip(((xmin - self.x0) // self.cell).astype(np.int64), 0, self.nx - 1)
+        iy0 = np.clip(((ymin - self.y0) // self.cell).astype(np.int64), 0, self.ny - 1)
+        ix1 = np.clip(((xmax - self.x0) // self.cell).astype(np.int64), 0, self.nx - 1)
+        iy1 = np.clip(((ymax - self.y0) // self.cell).astype(np.int64), 0, self.ny - 1)
+        w = ix1 - ix0 + 1
+        counts = w * (iy1 - iy0 + 1)
+        items = np.repeat(np.arange(len(xmin)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = ix0[items] + offset % w[items]
+        cy = iy0[items] + offset // w[items]
+        return cy * self.nx + cx, items
+
+    def _overlap(self, j, xmin, ymin, xmax, ymax):
+        bx0, by0, bx1, by1 = (b[j] for b in self.boxes)
+        return (bx0 <= xmax) & (xmin <= bx1) & (by0 <= ymax) & (ymin <= by1)
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """範圍查詢：回傳外接矩形與查詢矩形重疊的物件編號 (已排序)"""
+        pairs = self.query_pairs([xmin], [ymin], [xmax], [ymax])
+        return pairs[1]
+
+    def query_pairs(self, xmin, ymin, xmax, ymax):
+        """
+        批次範圍查詢：對另一組矩形 k 找出所有外接矩形重疊的 (k, j)
+        透過共同的格子配對，成本與候選組合數成正比，而不是 K × N
+        """
+        xmin, ymin, xmax, ymax = (np.asarray(v, dtype=float) for v in (xmin, ymin, xmax, ymax))
+        cells, queries = self._cover(xmin, ymin, xmax, ymax)
+        lo, hi = self.starts[cells], self.starts[cells + 1]
+        counts = hi - lo
+        k = np.repeat(queries, counts)
+        pos = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = self.items[np.repeat(lo, counts) + pos]
+        # 同一組合可能在好幾個格子都出現，以 k·N + j 去除重複
+        key = np.unique(k * len(self) + j)
+        k, j = key // len(self), key % len(self)
+        keep = self._overlap(j, xmin[k], ymin[k], xmax[k], ymax[k])
+        return k[keep], j[keep]
+
+    def self_pairs(self):
+        """索引內彼此外接矩形重疊的所有組合 (i < j)"""
+        i, j = self.query_pairs(*self.boxes)
+        keep = i < j
+        return i[keep], j[keep]
+
+    def nearest(self, px, py, distance):
+        """
+        最近物件查詢：distance(ids, px, py) 回傳這些物件到點的精確距離
+        以點為中心、半徑 r 的正方形做範圍查詢，r 由一格開始加倍；
+        找到距離 d ≤ r 的物件即可停止 (距離 ≤ r 的物件外接矩形必與正方形重疊)
+        回傳 (編號, 距離)，索引為空時回傳 (-1, inf)
+        """
+        if not (math.isfinite(px) and math.isfinite(py)):
+            # NaN / inf 的範圍查詢永遠找不到物件，r 又不會超過 limit，會無限迴圈
+            raise ValueError(f"查詢點必須是有限值: ({px}, {py})")
+        r = self.cell
+        limit = math.hypot(self.nx * self.cell, self.ny * self.cell) + \
+            math.hypot(px - self.x0, py - self.y0)
+        while True:
+            ids = self.query(px - r, py - r, px + r, py + r)
+            if ids.size:
+                d = distance(ids, px, py)
+                best = int(np.argmin(d))
+                if d[best] <= r:
+                    return int(ids[best]), float(d[best])
+                r = float(d[best])
+            elif r > limit:
+                return -1, math.inf
+            else:
+                r *= 2
+
+class SegmentIndex(GridIndex):
+    """線段的格網索引，提供最近線段查詢與線段—圓碰撞配對"""
+    def __init__(self, x1, y1, x2, y2, cell=None):
+        self.coords = tuple(np.asarray(v, dtype=float) for v in (x1, y1, x2, y2))
+        super().__init__(*segment_boxes(*self.coords), cell=cell)
+
+    def _distance(self, ids, px, py):
+        return point_segment_distance_batch(px, py, *(c[ids] for c in self.coords))
+
+    def nearest_segment(self, px, py):
+        """回傳離點 (px, py) 最近的線段編號與距離"""
+        return self.nearest(px, py, self._distance)
+
+    def circle_hits(self, cx, cy, r):
+        """
+        找出所有與圓周相交的 (線段編號, 圓編號)，回傳 (seg, circle, x, y, valid)
+        只對外接矩形重疊的候選組合呼叫 intersect_segment_circle_batch
+        """
+        cx, cy, r = (np.asarray(v, dtype=float) for v in (cx, cy, r))
+        circle, seg = self.query_pairs(*circle_boxes(cx, cy, r))
+        x, y, valid = intersect_segment_circle_batch(*(c[seg] for c in self.coords),
+                                                     cx[circle], cy[circle], r[circle])
+        hit = valid.any(axis=1)
+        return seg[hit], circle[hit], x[hit], y[hit], valid[hit]
+
+    def segment_hits(self):
+        """找出所有彼此相交的線段組合 (i < j)，回傳 (i, j, x, y)"""
+        i, j = self.self_pairs()
+        x, y, valid = intersect_segments_batch(*(c[i] for c in self.coords),
+                                               *(c[j] for c in self.coords))
+        return i[valid], j[valid], x[valid], y[valid]
+
+def bentley_ottmann(x1, y1, x2, y2, eps=1e-9):
+    """
+    Bentley–Ottmann 掃描線：回報所有線段交點，O((n + k) log n) 次比較
+    回傳 [(x, y, i, j), ...]，i < j，每對相交線段回報一次
+    事件依 (x, y) 字典序處理 (heapq)；掃描線狀態為依「目前 x 處的 y 值、再依斜率」排序的串列，
+    以二分搜尋定位，插入刪除為 C 層的串列搬移。垂直線段斜率視為 ∞，排在通過同一點的線段之後
+    共線重疊的線段也會回報 (交點取重疊部分的端點)
+    在每個事件點 p (de Berg 等人的 HandleEventPoint)：
+        U = 以 p 為起點、L = 以 p 為終點、C = 內部通過 p 的線段
+        |U ∪ L ∪ C| > 1 時回報交點；移除 L ∪ C、插入 U ∪ C，只檢查新出現的相鄰線段
+    """
+    # 端點依字典序排好 (左端點在前)；長度為 0 的線段不參與
+    segs = []
+    for a, b, c, d in zip(*(np.asarray(v, dtype=float).tolist() for v in (x1, y1, x2, y2))):
+        segs.append(((a, b), (c, d)) if (a, b) <= (c, d) else ((c, d), (a, b)))
+
+    def slope(s):
+        (ax, ay), (bx, by) = segs[s]
+        return (by - ay) / (bx - ax) if bx != ax else math.inf
+
+    def y_at(s, x, y):
+        # 垂直線段在 x 處的 y 值取事件點的 y (截在線段範圍內)
+        (ax, ay), (bx, by) = segs[s]
+        if bx == ax:
+            return min(max(y, ay), by)
+        return ay + (by - ay) * (x - ax) / (bx - ax)
+
+    def crossing(s, t):
+        # 與 intersect_segments_batch 相同的參數式，純量版本
+        (ax, ay), (bx, by) = segs[s]
+        (cx, cy), (dx, dy) = segs[t]
+        dx1, dy1, dx2, dy2 = bx - ax, by - ay, dx - cx, dy - cy
+        det = dx1 * dy2 - dy1 * dx2
+        if abs(det) <= 1e-12 * math.hypot(dx1, dy1) * math.hypot(dx2, dy2):
+            return None
+        ex, ey = cx - ax, cy - ay
+        t = (ex * dy2 - ey * dx2) / det
+        u = (ex * dy1 - ey * dx1) / det
+        if -1e-12 <= t <= 1 + 1e-12 and -1e-12 <= u <= 1 + 1e-12:
+            return ax + t * dx1, ay + t * dy1
+        return None
+
+    events = []            # (x, y) 的 heap
+    starts = {}            # 事件點 → 以該點為起點的線段
+    for s, (p, q) in enumerate(segs):
+        if p == q:
+            continue
+        if p not in starts:
+            starts[p] = []
+            heapq.heappush(events, p)
+        starts[p].append(s)
+        if q not in starts:
+            starts[q] = []
+            heapq.heappush(events, q)
+
+    status = []
+    reported = set()
+    result = []
+
+    def find_event(s, t, p):
+        # 只加入在 p 之後 (字典序) 的交點；已在佇列中的點不重複加入
+        q = crossing(s, t)
+        if q is None:
+            return
+        if q[0] > p[0] + eps or (q[0] >= p[0] - eps and q[1] > p[1] + eps):
+            if q not in starts:
+                starts[q] = []
+                heapq.heappush(events, q)
+
+    def lower_bound(x, y):
+        lo, hi = 0, len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if y_at(status[mid], x, y) < y - eps:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    while events:
+        p = heapq.heappop(events)
+        px, py = p
+        U = starts.pop(p, [])
+        # 狀態中通過 p 的線段在串列中是連續的一段 [lo, hi)
+        lo = hi = lower_bound(px, py)
+        while hi < len(status) and abs(y_at(status[hi], px, py) - py) <= eps:
+            hi += 1
+        through = status[lo:hi]
+        L = [s for s in through if abs(segs[s][1][0] - px) <= eps and abs(segs[s][1][1] - py) <= eps]
+        C = [s for s in through if s not in L]
+        involved = U + through
+        if len(involved) > 1:
+            for a in range(len(involved)):
+                for b in range(a + 1, len(involved)):
+                    pair = (min(involved[a], involved[b]), max(involved[a], involved[b]))
+                    if pair not in reported:
+                        reported.add(pair)
+                        result.append((px, py) + pair)
+        # 移除 L ∪ C，再依 p 之後的順序 (斜率) 插入 U ∪ C
+        new = sorted(U + C, key=slope)
+        status[lo:hi] = new
+        if not new:
+            if 0 < lo < len(status):
+                find_event(status[lo - 1], status[lo], p)
+        else:
+            if lo > 0:
+                find_event(status[lo - 1], status[lo], p)
+            top = lo + len(new) - 1
+            if top + 1 < len(status):
+                find_event(status[top], status[top + 1], p)
+    return result
+
 # --- 3. 整合驗證主程式 ---
 
 def run_geometry_test():
@@ -100,6 +565,113 @@ def run_geometry_test():
     print(f"平移 (+5, +5) 後: {tri}")
     tri.rotate(90, center=Point(5,5))
     print(f"繞 (5,5) 旋轉 90 度後: {tri}")
+    tri.scale(2, center=Point(5, 5))
+    tri.translate(-5, -5)
+    tri.rotate(-90)
+    print(f"以 (5,5) 放大 2 倍、平移 (-5, -5)、繞原點旋轉 -90 度後: {tri}")
+
+    print("\n=== 4. 批次運算測試 ===")
+    rng = np.random.default_rng(0)
+    n = 200_000
+    pts = rng.uniform(-10, 10, (4, n))
+    centers = rng.uniform(-10, 10, (2, n))
+    radii = rng.uniform(1, 5, n)
+    A, B, C = line_coefficients(*pts)
+
+    start = time.perf_counter()
+    lx, ly, lv = intersect_lines_batch(A[:-1], B[:-1], C[:-1], A[1:], B[1:], C[1:])
+    fx, fy, _ = foot_of_perpendicular_batch(centers[0], centers[1], A, B, C)
+    cx, cy, cv = intersect_line_circle_batch(A, B, C, centers[0], centers[1], radii)
+    t_batch = time.perf_counter() - start
+
+    lines = [Line(Point(*pts[:2, i]), Point(*pts[2:, i])) for i in range(n)]
+    circles = [Circle(Point(*centers[:, i]), radii[i]) for i in range(n)]
+    start = time.perf_counter()
+    ref_l = [intersect_lines(lines[i], lines[i + 1]) for i in range(n - 1)]
+    ref_f = [get_foot_of_perpendicular(c.center, l) for l, c in zip(lines, circles)]
+    ref_c = [intersect_line_circle(l, c) for l, c in zip(lines, circles)]
+    t_scalar = time.perf_counter() - start
+
+    err = max(max(abs(p.x - lx[i]), abs(p.y - ly[i])) for i, p in enumerate(ref_l) if p)
+    err = max(err, np.max(np.abs([(p.x, p.y) for p in ref_f] - np.stack([fx, fy], 1))))
+    assert [len(r) for r in ref_c] == cv.sum(axis=1).tolist()
+    for i, r in enumerate(ref_c):
+        for k, p in enumerate(r):
+            err = max(err, abs(p.x - cx[i, k]), abs(p.y - cy[i, k]))
+    print(f"{n} 組 直線交點 + 垂足 + 直線與圓交點: 逐個物件 {t_scalar:.3f} s，批次 {t_batch:.3f} s")
+    print(f"與逐個計算的最大差距: {err:.1e}，"
+          f"直線交點 {int(lv.sum())} 個，直線與圓交點 {int(cv.sum())} 個")
+
+    # 全部組合：1000 條直線 × 1000 個圓
+    start = time.perf_counter()
+    _, _, valid = intersect_line_circle_batch(A[:1000], B[:1000], C[:1000],
+                                              centers[0, :1000], centers[1, :1000],
+                                              radii[:1000], pairwise=True)
+    print(f"1000 × 1000 直線與圓的全部組合: {time.perf_counter() - start:.3f} s，"
+          f"相交的組合 {int(valid[..., 0].sum())}")
+
+    print("\n=== 5. 空間索引與掃描線 ===")
+    n, m = 20_000, 20_000
+    x1, y1 = rng.uniform(0, 100, (2, n))
+    angle, length = rng.uniform(0, 2 * np.pi, n), rng.uniform(0, 2, n)
+    x2, y2 = x1 + length * np.cos(angle), y1 + length * np.sin(angle)
+    cx, cy = rng.uniform(0, 100, (2, m))
+    r = rng.uniform(0.1, 1, m)
+
+    start = time.perf_counter()
+    index = SegmentIndex(x1, y1, x2, y2)
+    seg, circ, *_ = index.circle_hits(cx, cy, r)
+    t_grid = time.perf_counter() - start
+    print(f"{n} 條線段 × {m} 個圓: 格網索引 {t_grid:.3f} s，相交的組合 {len(seg)} "
+          f"(可能的組合 {n * m})")
+
+    # 以前 2000 條線段 × 前 2000 個圓的暴力全組合對照
+    k = 2000
+    i, j = np.divmod(np.arange(k * k), k)
+    _, _, hit = intersect_segment_circle_batch(x1[i], y1[i], x2[i], y2[i], cx[j], cy[j], r[j])
+    brute = set(zip(i[hit.any(axis=1)].tolist(), j[hit.any(axis=1)].tolist()))
+    sub = (seg < k) & (circ < k)
+    print(f"前 {k} × {k} 與暴力法一致: {brute == set(zip(seg[sub].tolist(), circ[sub].tolist()))}")
+
+    start = time.perf_counter()
+    sweep = bentley_ottmann(x1, y1, x2, y2)
+    t_sweep = time.perf_counter() - start
+    start = time.perf_counter()
+    gi, gj, _, _ = index.segment_hits()
+    t_pairs = time.perf_counter() - start
+    same = {(a, b) for _, _, a, b in sweep} == set(zip(gi.tolist(), gj.tolist()))
+    print(f"線段兩兩交點: Bentley–Ottmann {t_sweep:.3f} s，格網索引 {t_pairs:.3f} s，"
+          f"交點 {len(sweep)} 個，兩者一致: {same}")
+
+    queries = rng.uniform(0, 100, (100, 2))
+    found = [index.nearest_segment(qx, qy) for qx, qy in queries]
+    exact = [np.min(point_segment_distance_batch(qx, qy, x1, y1, x2, y2)) for qx, qy in queries]
+    print(f"最近線段查詢 100 次，與暴力法的最大距離差: "
+          f"{max(abs(d - e) for (_, d), e in zip(found, exact)):.1e}")
+
+    print("\n=== 6. 大量網格的延遲變換 ===")
+    tris = 1_000_000
+    mesh = Mesh(rng.uniform(-1, 1, (3 * tris, 2)))
+    original = mesh.vertices.copy()
+    steps = [("translate", (0.5, -0.25)), ("rotate", (30,)), ("scale", (1.5, 0.5)),
+             ("rotate", (-30, Point(1, 1))), ("translate", (-0.5, 0.25))] * 20
+
+    start = time.perf_counter()
+    for name, args in steps:
+        getattr(mesh, name)(*args)
+    t_compose = time.perf_counter() - start
+    start = time.perf_counter()
+    lazy = mesh.vertices
+    t_apply = time.perf_counter() - start
+
+    # 對照：每一步都立即對整個頂點陣列做一次運算
+    start = time.perf_counter()
+    eager = original
+    for name, args in steps:
+        eager = getattr(Affine(), name)(*args).apply(eager)
+    t_eager = time.perf_counter() - start
+    print(f"{tris} 個三角形、{len(steps)} 個變換: 組合 {t_compose * 1e3:.2f} ms + 套用 {t_apply:.3f} s，"
+          f"逐步套用 {t_eager:.3f} s，最大差距 {np.max(np.abs(lazy - eager)):.1e}")
 
 if __name__ == "__main__":
-    run_geometry_test()
\ No newline at end of file
+    run_geometry_test()
@@ -1,36 +1,280 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 from scipy import stats
 
-# 1. 模擬數據產生 (設定母體平均值為 100)
-np.random.seed(42)
-data = np.random.normal(loc=105, scale=15, size=30)  # 樣本平均值會接近 105
-
-# 2. 設定虛無假設 H0: mu = 100
-mu_0 = 100
-n = len(data)
+def _t_p(t_stat, df, alternative):
+    """由 t 統計量與自由度求 P 值 (純量或逐欄陣列皆可)"""
+    if alternative == "two-sided":
+        return 2 * stats.t.sf(np.abs(t_stat), df)
+    if alternative == "greater":
+        return stats.t.sf(t_stat, df)
+    if alternative == "less":
+        return stats.t.cdf(t_stat, df)
+    raise ValueError(f"未知的對立假設: {alternative}")
 
 # ---------------------------------------------------------
-# 手動推導單樣本 t 檢定 (Manual Calculation)
+# 串流版單樣本 t 檢定 (Welford 線上演算法)
 # ---------------------------------------------------------
-sample_mean = np.mean(data)
-sample_std = np.std(data, ddof=1)  # ddof=1 代表樣本標準差 (n-1)
-standard_error = sample_std / np.sqrt(n)
+class TTestAccumulator:
+    """
+    只保存 (n, 平均值, 離差平方和 M2)，記憶體固定，資料可以分批或逐筆送入
+    合併兩組部分結果 (Chan et al.)：
+        δ = mean_b - mean_a
+        mean = mean_a + δ·n_b / n
+        M2   = M2_a + M2_b + δ^2·n_a·n_b / n
+    每個 NumPy 區塊先在區塊內算出 (n, mean, M2)，再用同一個公式併入，
+    因此逐筆更新、分批更新與多個 worker 的結果合併都是同一件事
+    """
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def update(self, values):
+        """加入一個數值或一個陣列區塊"""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 1:
+            # 單筆的 Welford 更新
+            self.n += 1
+            delta = values[0] - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (values[0] - self.mean)
+        elif values.size:
+            mean = values.mean()
+            self.merge(TTestAccumulator(values.size, mean, np.sum((values - mean) ** 2)))
+        return self
+
+    def merge(self, other):
+        """併入另一個累加器 (例如另一個 worker 的部分結果)"""
+        n = self.n + other.n
+        if n:
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+        return self
+
+    @property
+    def variance(self):
+        """樣本變異數 (ddof=1)"""
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def standard_error(self):
+        return self.std / np.sqrt(self.n)
 
-# t 公式: (樣本平均 - 假設平均) / 標準誤差
-t_stat_manual = (sample_mean - mu_0) / standard_error
+    def ttest(self, mu_0, alternative="two-sided"):
+        """回傳 (t 統計量, P 值)，與 stats.ttest_1samp 相同的定義"""
+        t_stat = (self.mean - mu_0) / self.standard_error
+        return t_stat, _t_p(t_stat, self.n - 1, alternative)
+
+    def __repr__(self):
+        return f"TTestAccumulator(n={self.n}, mean={self.mean:.6g}, var={self.variance:.6g})"
 
 # ---------------------------------------------------------
-# 使用 Scipy 套件驗證
+# 大量欄位同時檢定：每一欄是一個特徵，每一列是一個樣本
 # ---------------------------------------------------------
-t_stat_scipy, p_value = stats.ttest_1samp(data, mu_0)
-
-print(f"--- 驗證結果 ---")
-print(f"樣本平均值: {sample_mean:.4f}")
-print(f"手動計算的 t 統計量: {t_stat_manual:.4f}")
-print(f"Scipy 計算的 t 統計量: {t_stat_scipy:.4f}")
-print(f"P 值 (顯著性): {p_value:.4f}")
-
-if p_value < 0.05:
-    print("\n結論: P < 0.05，拒絕虛無假設 (有顯著差異)")
-else:
-    print("\n結論: P >= 0.05，無法拒絕虛無假設 (無顯著差異)")
\ No newline at end of file
+def ttest_columns(X, mu_0=0.0, alternative="two-sided"):
+    """
+    對 2-D 陣列 X (樣本數 n × 特徵數 m) 的每一欄做單樣本 t 檢定
+    平均值與變異數都是沿 axis=0 的向量化歸約，回傳 (t, p) 兩個長度 m 的陣列
+    """
+    X = np.asarray(X, dtype=float)
+    n = X.shape[0]
+    mean = X.mean(axis=0)
+    se = X.std(axis=0, ddof=1) / np.sqrt(n)
+    t_stat = (mean - mu_0) / se
+    return t_stat, _t_p(t_stat, n - 1, alternative)
+
+def adjust_pvalues(p, method="bh"):
+    """
+    多重檢定校正，回傳校正後的 P 值 (與 alpha 比較即可決定是否拒絕)
+      "bonferroni": min(1, m·p)
+      "bh": Benjamini–Hochberg (控制 FDR)，由大到小取 m·p_(k) / k 的累積最小值
+    NaN (例如變異數為 0 的欄位) 不計入 m，校正後仍留在原位置為 NaN
+    """
+    p = np.asarray(p, dtype=float)
+    finite = ~np.isnan(p)
+    m = np.count_nonzero(finite)
+    if method == "bonferroni":
+        return np.minimum(p * m, 1.0)
+    if method == "bh":
+        valid = p[finite]
+        order = np.argsort(valid)
+        scaled = valid[order] * m / np.arange(1, m + 1)
+        ranked = np.empty(m)
+        ranked[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+        adjusted = np.full(p.shape, np.nan)
+        adjusted[finite] = ranked
+        return adjusted
+    raise ValueError(f"未知的校正方法: {method}")
+
+# worker 程序內共用的資料 (由 initializer 設定一次，避免每個區塊都重新傳送)
+_shared = {}
+
+def _init_worker(D, t_obs, alternative):
+    _shared.update(D=D, t_obs=t_obs, alternative=alternative)
+
+def _exceed(t_star, t_obs, alternative):
+    # 重抽樣統計量至少和觀察值一樣極端的次數 (逐欄)
+    if alternative == "two-sided":
+        return (np.abs(t_star) >= np.abs(t_obs)).sum(axis=0)
+    if alternative == "greater":
+        return (t_star >= t_obs).sum(axis=0)
+    return (t_star <= t_obs).sum(axis=0)
+
+def _resample_block(method, size, seed):
+    """
+    在 worker 中產生 size 組重抽樣並回傳逐欄的計數 (不保留任何一組重抽樣結果)
+    兩種方法都只需一次矩陣乘法就算出所有欄位的 size 組 t*：
+      permutation: 符號翻轉檢定，D = X - mu_0，每組以 ±1 向量 s 得到 mean* = s·D / n，
+                   Σd^2 不受翻轉影響，var* = (Σd^2 - n·mean*^2) / (n - 1)
+      bootstrap:   D = X - 欄平均 (使虛無假設成立)，每組以多項分配次數 w 加權，
+                   mean* = w·D / n，var* = (w·D^2 - n·mean*^2) / (n - 1)
+    """
+    D, t_obs, alternative = _shared["D"], _shared["t_obs"], _shared["alternative"]
+    n = D.shape[0]
+    rng = np.random.default_rng(seed)
+    if method == "permutation":
+        W = rng.choice([-1.0, 1.0], size=(size, n))
+        sum_sq = (D * D).sum(axis=0)
+    else:
+        W = rng.multinomial(n, np.full(n, 1.0 / n), size=size).astype(float)
+        sum_sq = W @ (D * D)
+    mean = W @ D / n
+    var = np.maximum(sum_sq - n * mean * mean, 0.0) / (n - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_star = mean / np.sqrt(var / n)
+    return _exceed(t_star, t_obs, alternative)
+
+def resample_pvalues(X, mu_0=0.0, method="permutation", n_resamples=10_000,
+                     alternative="two-sided", workers=None, block=None, seed=0):
+    """
+    以重抽樣求每一欄的 P 值 (permutation 為符號翻轉、bootstrap 為有放回抽樣)
+    重抽樣分成每塊 block 組的區塊，分給 ProcessPoolExecutor 執行；
+    第 k 塊使用 SeedSequence(seed).spawn 的第 k 個子種子，結果與 worker 數量、完成順序無關
+    每塊完成後立即併入逐欄的計數器，P = (計數 + 1) / (n_resamples + 1)
+    block 預設讓每塊的 t* 矩陣約 4M 個元素
+    """
+    if method not in ("permutation", "bootstrap"):
+        raise ValueError(f"未知的重抽樣方法: {method}")
+    X = np.asarray(X, dtype=float)
+    t_obs, _ = ttest_columns(X, mu_0, alternative)
+    D = X - mu_0 if method == "permutation" else X - X.mean(axis=0)
+    if block is None:
+        block = max(1, min(n_resamples, (1 << 22) // X.shape[1]))
+    sizes = [min(block, n_resamples - s) for s in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    counts = np.zeros(X.shape[1], dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(D, t_obs, alternative)) as pool:
+        futures = [pool.submit(_resample_block, method, size, s) for size, s in zip(sizes, seeds)]
+        for future in as_completed(futures):
+            counts += future.result()
+    return (counts + 1) / (n_resamples + 1)
+
+if __name__ == "__main__":
+    # 1. 模擬數據產生 (設定母體平均值為 100)
+    np.random.seed(42)
+    data = np.random.normal(loc=105, scale=15, size=30)  # 樣本平均值會接近 105
+
+    # 2. 設定虛無假設 H0: mu = 100
+    mu_0 = 100
+    n = len(data)
+
+    # ---------------------------------------------------------
+    # 手動推導單樣本 t 檢定 (Manual Calculation)
+    # ---------------------------------------------------------
+    sample_mean = np.mean(data)
+    sample_std = np.std(data, ddof=1)  # ddof=1 代表樣本標準差 (n-1)
+    standard_error = sample_std / np.sqrt(n)
+
+    # t 公式: (樣本平均 - 假設平均) / 標準誤差
+    t_stat_manual = (sample_mean - mu_0) / standard_error
+
+    # ---------------------------------------------------------
+    # 使用 Scipy 套件驗證
+    # ---------------------------------------------------------
+    t_stat_scipy, p_value = stats.ttest_1samp(data, mu_0)
+
+    print(f"--- 驗證結果 ---")
+    print(f"樣本平均值: {sample_mean:.4f}")
+    print(f"手動計算的 t 統計量: {t_stat_manual:.4f}")
+    print(f"Scipy 計算的 t 統計量: {t_stat_scipy:.4f}")
+    print(f"P 值 (顯著性): {p_value:.4f}")
+
+    if p_value < 0.05:
+        print("\n結論: P < 0.05，拒絕虛無假設 (有顯著差異)")
+    else:
+        print("\n結論: P >= 0.05，無法拒絕虛無假設 (無顯著差異)")
+
+    # ---------------------------------------------------------
+    # 串流計算：逐筆、分批、多個 worker 合併都得到相同結果
+    # ---------------------------------------------------------
+    single = TTestAccumulator()
+    for x in data:
+        single.update(x)
+
+    workers = [TTestAccumulator() for _ in range(3)]
+    for k, chunk in enumerate(np.array_split(data, 7)):
+        workers[k % 3].update(chunk)
+    merged = TTestAccumulator()
+    for w in workers:
+        merged.merge(w)
+
+    print(f"\n--- 串流累加器 ---")
+    for name, acc in [("逐筆更新", single), ("分批 + 合併", merged)]:
+        t_stream, p_stream = acc.ttest(mu_0)
+        print(f"{name}: t = {t_stream:.4f}, P = {p_stream:.4f}, "
+              f"與 Scipy 的差距 t: {abs(t_stream - t_stat_scipy):.1e}, P: {abs(p_stream - p_value):.1e}")
+
+    # 大量資料：10^7 筆分成 100 個區塊串流送入，記憶體只需一個區塊
+    rng = np.random.default_rng(0)
+    big = rng.normal(100.01, 15, 10_000_000)
+    stream = TTestAccumulator()
+    for chunk in np.array_split(big, 100):
+        stream.update(chunk)
+    t_big, p_big = stats.ttest_1samp(big, mu_0)
+    t_stream, p_stream = stream.ttest(mu_0)
+    print(f"10^7 筆串流: t = {t_stream:.6f} (Scipy {t_big:.6f})，P = {p_stream:.6f} (Scipy {p_big:.6f})")
+    print(f"相對誤差 t: {abs(t_stream / t_big - 1):.1e}, P: {abs(p_stream / p_big - 1):.1e}")
+
+    # ---------------------------------------------------------
+    # 大量欄位：200,000 個特徵同時檢定
+    # ---------------------------------------------------------
+    n_features = 200_000
+    X = rng.normal(100, 15, (30, n_features))
+    X[:, :1000] += 12        # 前 1000 個特徵真的有差異
+
+    start = time.perf_counter()
+    t_cols, p_cols = ttest_columns(X, mu_0)
+    t_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    loop = [stats.ttest_1samp(X[:, j], mu_0) for j in range(2000)]
+    t_loop = (time.perf_counter() - start) * n_features / 2000
+    err = max(abs(r.pvalue - p_cols[j]) for j, r in enumerate(loop))
+    print(f"\n--- {n_features} 個特徵的批次 t 檢定 ---")
+    print(f"向量化: {t_batch:.3f} s，逐欄 ttest_1samp (由 2000 欄推估): {t_loop:.1f} s，"
+          f"P 值最大差距 {err:.1e}")
+    for method in ["bonferroni", "bh"]:
+        reject = adjust_pvalues(p_cols, method) < 0.05
+        print(f"{method:>10}: 拒絕 {reject.sum()} 個 (其中真的有差異 {reject[:1000].sum()} 個)")
+    print(f"{'未校正':>10}: 拒絕 {(p_cols < 0.05).sum()} 個")
+
+    # 重抽樣 P 值：2000 個特徵 × 10000 次，分給 worker；worker 數量不影響結果
+    sub = X[:, 995:2995]
+    for method in ["permutation", "bootstrap"]:
+        start = time.perf_counter()
+        p_resample = resample_pvalues(sub, mu_0, method=method, n_resamples=10_000, workers=4)
+        elapsed = time.perf_counter() - start
+        same = np.array_equal(p_resample,
+                              resample_pvalues(sub, mu_0, method=method, n_resamples=10_000, workers=1))
+        print(f"{method}: {elapsed:.2f} s，與 1 個 worker 結果相同: {same}，"
+              f"與 t 分布 P 值的最大差距 {np.max(np.abs(p_resample - p_cols[995:2995])):.3f}")
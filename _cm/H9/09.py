@@ -1,6 +1,14 @@
+import hashlib
+import time
+import warnings
+import weakref
+from collections import OrderedDict
+from fractions import Fraction
+
 import numpy as np
+import scipy.linalg
 
-# 1. 遞迴計算行列式
+# 1. 遞迴計算行列式 (餘因子展開，O(n!)，僅作為教學與小矩陣的對照)
 def recursive_det(matrix):
     n = len(matrix)
     if n == 1: return matrix[0][0]
@@ -13,12 +21,330 @@ def recursive_det(matrix):
     return det
 
 # 2. LU 分解計算行列式
+def _lu_stack(A):
+    """
+    一疊 (k, n, n) 矩陣同時做部分選主元的 LU 分解 (Doolittle，L 的對角線為 1)
+    每一欄的選主元、列交換與剩餘子矩陣的秩一更新都是整疊一起的向量化運算
+    回傳 (LU, piv)，piv[:, j] 為第 j 步與第 j 列交換的列 (與 LAPACK getrf 相同的記法)
+    """
+    A = np.array(A, dtype=np.result_type(A, float))
+    k, n = A.shape[0], A.shape[-1]
+    piv = np.empty((k, n), dtype=np.intp)
+    batch = np.arange(k)
+    for j in range(n):
+        p = j + np.argmax(np.abs(A[:, j:, j]), axis=1)
+        piv[:, j] = p
+        row = A[batch, j].copy()
+        A[batch, j] = A[batch, p]
+        A[batch, p] = row
+        pivot = A[:, j, j:j + 1]
+        # 主元為 0 時整欄 (主元以下) 都是 0，乘數維持 0
+        np.divide(A[:, j + 1:, j], pivot, out=A[:, j + 1:, j], where=pivot != 0)
+        A[:, j + 1:, j + 1:] -= A[:, j + 1:, j, None] * A[:, j, None, j + 1:]
+    return A, piv
+
+def lu_factor(A):
+    """
+    部分選主元 LU 分解，A 可為 (n, n) 或一疊 (k, n, n)
+    單一矩陣交給 LAPACK (scipy.linalg.lu_factor)，一疊矩陣使用 _lu_stack
+    """
+    A = np.asarray(A)
+    A = A.astype(complex if np.iscomplexobj(A) else float, copy=False)
+    if A.ndim == 2:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", scipy.linalg.LinAlgWarning)  # 奇異矩陣不需警告
+            return scipy.linalg.lu_factor(A, check_finite=False)
+    shape = A.shape
+    LU, piv = _lu_stack(A.reshape(-1, shape[-2], shape[-1]))
+    return LU.reshape(shape), piv.reshape(shape[:-1])
+
+def pivot_sign(piv):
+    """置換矩陣的行列式：每一次真正的列交換 (piv[j] != j) 讓符號反轉一次"""
+    swaps = np.count_nonzero(piv != np.arange(piv.shape[-1]), axis=-1)
+    return 1.0 - 2.0 * (swaps % 2)
+
+def lu_slogdet(LU, piv):
+    """由 LU 分解求 (sign, log|det|)：以對數相加，任何尺度都不會溢位"""
+    d = np.diagonal(LU, axis1=-2, axis2=-1)
+    sign = pivot_sign(piv) * np.prod(np.sign(d), axis=-1)
+    with np.errstate(divide="ignore"):
+        return sign, np.sum(np.log(np.abs(d)), axis=-1)
+
 def lu_det(A):
-    from scipy.linalg import lu
-    P, L, U = lu(A)
-    # det(A) = det(P) * det(L) * det(U)
-    # P 的行列式取決於交換次數 (+1 或 -1)
-    return np.prod(np.diag(U)) * np.linalg.det(P)
+    """
+    det(A) = det(P)·det(L)·det(U) = (±1)·1·Π U_ii
+    P 的符號由選主元時的交換次數決定，不需要另外計算 det(P)
+    """
+    LU, piv = lu_factor(A)
+    d = np.diagonal(LU, axis1=-2, axis2=-1)
+    return pivot_sign(piv) * np.prod(d, axis=-1)
+
+def slogdet(A):
+    """(sign, log|det A|)，適合大型或尺度差異極大的矩陣"""
+    return lu_slogdet(*lu_factor(A))
+
+def _exact_value(v):
+    """把矩陣元素轉成 int 或 Fraction；整數值的浮點數取 int，其餘浮點數取精確的 Fraction"""
+    if isinstance(v, Fraction):
+        return v
+    if isinstance(v, (int, np.integer)):
+        return int(v)
+    v = float(v)
+    if not np.isfinite(v):
+        raise ValueError(f"無法精確計算含 {v} 的行列式")
+    return int(v) if v.is_integer() else Fraction(v)
+
+def bareiss_det(M):
+    """
+    Bareiss 無分數消去法：整數矩陣全程只出現整數 (Fraction 矩陣則保持分數)，O(n^3)
+        M[i][j] ← (M[i][j]·M[k][k] - M[i][k]·M[k][j]) / M[k-1][k-1]
+    這個除法一定整除 (Sylvester 恆等式)；每一步以 object 陣列向量化整個子矩陣
+    非整數的浮點數以其精確的二進位值 Fraction(v) 參與計算 (不截斷)；
+    只要有一個 Fraction，全部元素都轉成 Fraction，除法才會保持精確
+    """
+    M = np.array([[_exact_value(v) for v in row] for row in M], dtype=object)
+    n = len(M)
+    if n == 0:
+        return 1
+    exact_int = all(isinstance(v, int) for v in M.flat)
+    if not exact_int:
+        M = np.array([[Fraction(v) for v in row] for row in M], dtype=object)
+    sign, prev = 1, 1
+    for k in range(n - 1):
+        if M[k, k] == 0:
+            nonzero = [i for i in range(k + 1, n) if M[i, k] != 0]
+            if not nonzero:
+                return 0
+            M[[k, nonzero[0]]] = M[[nonzero[0], k]]
+            sign = -sign
+        sub = M[k + 1:, k + 1:] * M[k, k] - np.outer(M[k + 1:, k], M[k, k + 1:])
+        M[k + 1:, k + 1:] = sub // prev if exact_int else sub / prev
+        prev = M[k, k]
+    return sign * M[n - 1, n - 1]
+
+def _is_exact(A):
+    A = np.asarray(A)
+    if A.dtype.kind in "iub":
+        return True
+    return A.dtype == object and all(isinstance(v, (int, Fraction)) for v in A.flat)
+
+def det(A, method="auto"):
+    """
+    行列式，依輸入型別選擇演算法：
+      整數 / Fraction (含 object 陣列) → Bareiss，回傳精確的 int / Fraction
+      浮點數 → 部分選主元 LU，sign 由交換次數決定；
+              Π U_ii 在相乘過程中溢位或下溢時，改由 slogdet 的 sign·exp(log|det|) 求值
+    A 可為 (n, n) 或一疊 (..., n, n)；method 可指定 "bareiss"、"lu"、"slogdet"
+    """
+    A_arr = np.asarray(A)
+    if method == "auto":
+        method = "bareiss" if _is_exact(A_arr) else "lu"
+    if method == "bareiss":
+        if A_arr.ndim == 2:
+            return bareiss_det(A_arr)
+        flat = A_arr.reshape(-1, *A_arr.shape[-2:])
+        return np.array([bareiss_det(m) for m in flat], dtype=object).reshape(A_arr.shape[:-2])
+    LU, piv = lu_factor(A_arr)
+    if method == "slogdet":
+        sign, logabs = lu_slogdet(LU, piv)
+        return sign * np.exp(logabs)
+    if method != "lu":
+        raise ValueError(f"未知的行列式方法: {method}")
+    d = np.diagonal(LU, axis1=-2, axis2=-1)
+    with np.errstate(over="ignore", under="ignore"):
+        direct = pivot_sign(piv) * np.prod(d, axis=-1)
+    # 乘積過程溢位 (inf) 或下溢 (對角線無 0 卻得到 0) 時，改由 exp(log|det|) 求值
+    bad = ~np.isfinite(direct) | ((direct == 0) & np.all(d != 0, axis=-1))
+    if np.any(bad):
+        sign, logabs = lu_slogdet(LU, piv)
+        direct = np.where(bad, sign * np.exp(logabs), direct)
+    return direct[()]
+
+# 2b. 可重複使用的 LU 分解與分解快取
+class LUFactorization:
+    """
+    分解一次、重複使用的部分選主元 LU (P·A = L·U)，A 為 (n, n) 實數或複數矩陣
+      det() / slogdet()   O(1)，分解時已由 U 的對角線求得
+      solve(b)            O(n^2·k)，b 形狀 (n,) 或 (n, k)，k 個右端一次求解
+      inverse()           O(n^3)，第一次呼叫才計算，之後快取
+      rank_one_update(u, v) / update_row / update_column
+                          A ← A + u·v^T，以 Sherman–Morrison 疊加在原分解上，O(n^2)：
+                            (A + u v^T)^-1 b = A^-1 b - z·(v·A^-1 b) / (1 + v·z)，z = A^-1 u
+                          行列式由行列式引理 det(A + u v^T) = det(A)·(1 + v·z) 更新
+    每個累積的修正讓 solve 多 O(n) 的工作，超過 max_updates 個 (或 1 + v·z 接近 0) 時
+    由目前的 A 重新分解；version 在每次更新後加一
+    """
+
+    def __init__(self, A, max_updates=None):
+        A = np.array(A, dtype=complex if np.iscomplexobj(A) else float)
+        if A.ndim != 2 or A.shape[0] != A.shape[1]:
+            raise ValueError(f"需要方陣，收到形狀 {A.shape}")
+        self.A = A
+        self.n = A.shape[0]
+        self.max_updates = max(8, self.n // 16) if max_updates is None else max_updates
+        self.version = 0
+        self.refactorizations = 0
+        self._factor()
+
+    def _factor(self):
+        self.lu, self.piv = lu_factor(self.A)
+        self._sign, self._logabs = lu_slogdet(self.lu, self.piv)
+        d = np.diagonal(self.lu)
+        with np.errstate(over="ignore", under="ignore"):
+            direct = pivot_sign(self.piv) * np.prod(d)
+            # 乘積溢位或下溢時改由 exp(log|det|) 求值 (真的超出浮點範圍時仍為 inf / 0)
+            if not np.isfinite(direct) or (direct == 0 and np.all(d != 0)):
+                direct = self._sign * np.exp(self._logabs)
+        self._det = direct
+        self._w = []   # z_i / (1 + v_i·z_i)
+        self._v = []
+        self._inverse = None
+
+    @property
+    def singular(self):
+        return self._logabs == -np.inf
+
+    @property
+    def pending_updates(self):
+        return len(self._v)
+
+    def det(self):
+        return self._det
+
+    def slogdet(self):
+        return self._sign, self._logabs
+
+    def solve(self, b):
+        """解 A x = b，b 為 (n,) 或 (n, k)"""
+        b = np.asarray(b)
+        if b.shape[0] != self.n:
+            raise ValueError(f"右端第一維應為 {self.n}，收到形狀 {b.shape}")
+        if self.singular:
+            raise np.linalg.LinAlgError("矩陣為奇異")
+        x = scipy.linalg.lu_solve((self.lu, self.piv), b, check_finite=False)
+        for w, v in zip(self._w, self._v):
+            x -= np.multiply.outer(w, v @ x)
+        return x
+
+    def inverse(self):
+        """A^-1 (唯讀)，第一次呼叫時以 solve(I) 求得"""
+        if self._inverse is None:
+            self._inverse = self.solve(np.eye(self.n, dtype=self.A.dtype))
+            self._inverse.flags.writeable = False
+        return self._inverse
+
+    def refactor(self):
+        self._factor()
+        self.refactorizations += 1
+
+    def rank_one_update(self, u, v):
+        """A ← A + u·v^T"""
+        u = np.asarray(u, dtype=self.A.dtype)
+        v = np.asarray(v, dtype=self.A.dtype)
+        if self.singular or len(self._v) >= self.max_updates:
+            z = None
+        else:
+            z = self.solve(u)
+            denom = 1 + v @ z
+            # 1 + v·z ≈ 0 表示更新後接近奇異，Sherman–Morrison 失去精度
+            if abs(denom) <= 1e-12 * (1 + np.abs(v) @ np.abs(z)):
+                z = None
+        self.A += np.outer(u, v)
+        self.version += 1
+        if z is None:
+            self.refactor()
+            return self
+        self._w.append(z / denom)
+        self._v.append(v)
+        with np.errstate(over="ignore", under="ignore"):
+            self._det = self._det * denom
+        self._sign = self._sign * denom / abs(denom)
+        self._logabs = self._logabs + np.log(abs(denom))
+        if self._inverse is not None:
+            self._inverse = self._inverse - np.outer(z / denom, v @ self._inverse)
+            self._inverse.flags.writeable = False
+        return self
+
+    def update_row(self, i, row):
+        """把第 i 列換成 row：u = e_i，v = row - A[i]"""
+        u = np.zeros(self.n, dtype=self.A.dtype)
+        u[i] = 1
+        return self.rank_one_update(u, np.asarray(row) - self.A[i])
+
+    def update_column(self, j, column):
+        """把第 j 欄換成 column：u = column - A[:, j]，v = e_j"""
+        v = np.zeros(self.n, dtype=self.A.dtype)
+        v[j] = 1
+        return self.rank_one_update(np.asarray(column) - self.A[:, j], v)
+
+    def __repr__(self):
+        return (f"LUFactorization(n={self.n}, version={self.version}, "
+                f"pending_updates={self.pending_updates}, refactorizations={self.refactorizations})")
+
+class FactorizationCache:
+    """
+    以 (id(A), 版本) 為鍵的 LRU 分解快取，最多保留 max_entries 個分解
+    版本依序取自參數 version、A.version 屬性；兩者都沒有時以 A 內容的雜湊代替
+    (O(n^2)，遠低於 O(n^3) 的分解，原地修改過的陣列不會拿到過期的分解)
+    另以 weakref 確認該 id 仍是原來的陣列 (物件回收後 id 可能被重用)；無法 weakref 的輸入 (如 list) 不快取
+    取得的分解若被 rank_one_update 修改過，下次視為未命中並重新分解
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _version(A, version):
+        if version is None:
+            version = getattr(A, "version", None)
+        if version is None:
+            data = np.ascontiguousarray(A)
+            version = (data.shape, data.dtype.str, hashlib.blake2b(data.data, digest_size=16).digest())
+        return version
+
+    def get(self, A, version=None):
+        key = id(A)
+        version = self._version(A, version)
+        entry = self.entries.get(key)
+        if entry is not None:
+            ref, ver, fac, fac_version = entry
+            if ref() is A and ver == version and fac.version == fac_version:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return fac
+        self.misses += 1
+        fac = LUFactorization(A)
+        try:
+            ref = weakref.ref(A, self._dropper(key))
+        except TypeError:
+            return fac
+        self.entries[key] = (ref, version, fac, fac.version)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return fac
+
+    def _dropper(self, key):
+        def drop(ref):
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is ref:
+                del self.entries[key]
+        return drop
+
+    def clear(self):
+        self.entries.clear()
+
+    def __repr__(self):
+        return f"FactorizationCache(entries={len(self.entries)}, hits={self.hits}, misses={self.misses})"
+
+factor_cache = FactorizationCache()
+
+def factorize(A, version=None):
+    """取得 A 的 LUFactorization (經由全域快取)"""
+    return factor_cache.get(A, version)
 
 # 3. 驗證分解與還原
 def verify_decompositions():
@@ -26,7 +352,8 @@ def verify_decompositions():
     
     # Eigen Decomposition (僅限對稱或方陣)
     evals, evecs = np.linalg.eig(A)
-    A_eig = evecs @ np.diag(evals) @ np.linalg.inv(evecs)
+    # evecs·diag(evals)·evecs^-1：解 evecs^T X^T = (evecs·diag(evals))^T，不顯式求逆
+    A_eig = LUFactorization(evecs.T).solve((evecs * evals).T).T
     
     # SVD
     U, S, Vt = np.linalg.svd(A)
@@ -47,4 +374,87 @@ def do_pca(data, k=1):
 # 測試
 A_test = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9+1e-9]]) # 加微小值避免奇異矩陣
 print("Recursive Det:", recursive_det(A_test))
-verify_decompositions()
\ No newline at end of file
+print("LU Det:", det(A_test))
+verify_decompositions()
+
+# 行列式引擎：速度、精確度與批次
+rng = np.random.default_rng(0)
+print("\n n | 餘因子展開      | LU (det)       | 相對差距")
+for n in [6, 8, 12]:
+    M = rng.standard_normal((n, n))
+    d_fast = det(M)
+    start = time.perf_counter()
+    for _ in range(100):
+        det(M)
+    t_fast = (time.perf_counter() - start) / 100
+    if n <= 8:
+        start = time.perf_counter()
+        d_slow = recursive_det(M)
+        t_slow = f"{time.perf_counter() - start:10.4f} s"
+        gap = f"{abs(d_fast - d_slow) / abs(d_slow):.1e}"
+    else:
+        t_slow, gap = "(略過: 12! 項)", "-"
+    print(f"{n:>2} | {t_slow:>14} | {t_fast * 1e6:10.1f} µs  | {gap}")
+
+# 精確：Hilbert 矩陣 H_ij = 1/(i+j+1) 的行列式，以 Fraction 做 Bareiss 消去
+n = 8
+hilbert = [[Fraction(1, i + j + 1) for j in range(n)] for i in range(n)]
+exact = det(hilbert)
+print(f"\n{n}×{n} Hilbert 矩陣: 精確 det = {exact} ≈ {float(exact):.6e}，"
+      f"浮點 LU = {det(np.array(hilbert, dtype=float)):.6e}")
+big_int = rng.integers(-10**6, 10**6, (12, 12))
+print(f"12×12 整數矩陣 (元素 ~10^6) 的精確 det 有 {len(str(abs(det(big_int))))} 位數，"
+      f"與浮點 LU 的相對差距 {abs(float(det(big_int)) / det(big_int.astype(float)) - 1):.1e}")
+
+# 尺度差異大：直接相乘會溢位，改用 slogdet
+scaled = np.diag([1e200, 1e200, 1e-300]) @ rng.standard_normal((3, 3))
+print(f"尺度差異大的矩陣: det = {det(scaled):.6e} (np.linalg.det = {np.linalg.det(scaled):.6e})")
+
+# 批次：10^5 個 4×4 矩陣一次計算
+stack = rng.standard_normal((100_000, 4, 4))
+start = time.perf_counter()
+d_stack = det(stack)
+t_stack = time.perf_counter() - start
+print(f"10^5 個 4×4 矩陣: 批次 LU {t_stack:.3f} s，"
+      f"與 np.linalg.det 的最大相對差距 {np.max(np.abs(d_stack / np.linalg.det(stack) - 1)):.1e}")
+# 重複求解：分解一次，之後每個右端只需 O(n^2)
+n, k = 400, 200
+M = rng.standard_normal((n, n))
+rhs = rng.standard_normal((n, k))
+start = time.perf_counter()
+for i in range(k):
+    np.linalg.solve(M, rhs[:, i])
+t_naive = time.perf_counter() - start
+start = time.perf_counter()
+fac = factorize(M)
+for i in range(k):
+    fac.solve(rhs[:, i])
+t_fac = time.perf_counter() - start
+start = time.perf_counter()
+X = factorize(M).solve(rhs)
+t_block = time.perf_counter() - start
+print(f"\n{n}×{n} 矩陣、{k} 個右端: 每次 np.linalg.solve {t_naive:.3f} s，"
+      f"分解一次後逐一求解 {t_fac:.3f} s，一次求解全部 {t_block:.4f} s "
+      f"(殘差 {np.max(np.abs(M @ X - rhs)):.1e})，{factor_cache}")
+
+# 秩一更新：逐次替換列與欄，與重新計算比較
+fac = LUFactorization(M)
+inv = fac.inverse()
+B = M.copy()
+start = time.perf_counter()
+for step in range(12):
+    i = int(rng.integers(n))
+    row = rng.standard_normal(n)
+    if step % 2:
+        fac.update_column(i, row)
+        B[:, i] = row
+    else:
+        fac.update_row(i, row)
+        B[i] = row
+    x = fac.solve(rhs[:, 0])
+t_update = time.perf_counter() - start
+sign, logabs = np.linalg.slogdet(B)
+print(f"12 次列/欄替換 (含每次求解) {t_update:.3f} s，{fac}: "
+      f"解的相對誤差 {np.max(np.abs(x - np.linalg.solve(B, rhs[:, 0]))) / np.max(np.abs(x)):.1e}，"
+      f"log|det| 差距 {abs(fac.slogdet()[1] - logabs):.1e} (符號{'一致' if fac.slogdet()[0] == sign else '不一致'})，"
+      f"逆矩陣差距 {np.max(np.abs(fac.inverse() @ B - np.eye(n))):.1e}")